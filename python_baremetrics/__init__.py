@@ -1,9 +1,15 @@
 # -*- coding: utf-8 -*-
 
+from .cache import ReadCache
 from .client import BaremetricsClient
 from .exceptions import BaremetricsException
+from .hedging import HedgingPolicy
+from .ratelimit import RateLimiter
+from .transport import Transport, RequestsTransport, HTTP2Transport
 
-__all__ = ['BaremetricsClient', 'BaremetricsException']
+__all__ = ['BaremetricsClient', 'BaremetricsException', 'HedgingPolicy',
+           'RateLimiter', 'Transport', 'RequestsTransport', 'HTTP2Transport',
+           'ReadCache']
 
 __author__ = """Maxim Smirnov"""
 __email__ = 'smirnoffmg@gmail.com'
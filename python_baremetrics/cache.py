@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+import collections
+import threading
+import time
+
+from .compression import RESOURCES
+
+
+def collection_of(url):
+    """
+    :return: url of the collection an object url belongs to,
+             e.g. 'src/customers' for 'src/customers/cus_1/events'
+    """
+    segments = url.split('?')[0].strip('/').split('/')
+    for index, segment in enumerate(segments):
+        if segment in RESOURCES:
+            return '/'.join(segments[:index + 1])
+    return '/'.join(segments)
+
+
+class ReadCache(object):
+    """
+    Local copy of GET responses used by reads that accept stale data.
+
+    Any local mirror can take its place by implementing ``get``, ``set``
+    and ``invalidate`` with the same signatures.
+    """
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        :return: (time stored, response) or None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                # keep recently read entries, evict the least recently used
+                del self._entries[key]
+                self._entries[key] = entry
+            return entry
+
+    def set(self, key, response, stored_at=None):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (stored_at or time.time(), response)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, prefix):
+        with self._lock:
+            for key in [k for k in self._entries if k.startswith(prefix)]:
+                del self._entries[key]
+
+
+class ReadStats(object):
+    """
+    Reads served locally vs from the API, per endpoint.
+    """
+
+    def __init__(self):
+        self._stats = collections.defaultdict(collections.Counter)
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, origin):
+        """
+        :param origin: 'local' or 'remote'
+        """
+        with self._lock:
+            self._stats[endpoint][origin] += 1
+
+    def by_endpoint(self):
+        with self._lock:
+            return {endpoint: dict(stats)
+                    for endpoint, stats in self._stats.items()}
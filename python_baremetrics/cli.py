@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+"""Command line tool for bulk export, import, sync and purge jobs."""
+from __future__ import print_function
+
+import argparse
+import collections
+import logging
+import os
+import sys
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+from .client import BaremetricsClient
+from .exceptions import BaremetricsException
+from .export import KINDS as EXPORT_KINDS, export
+from .importer import (
+    REQUIRED as IMPORT_KINDS, Importer, detect_format, parse_chunk,
+    read_chunks,
+)
+from .purge import ORDER as PURGE_KINDS, Purger
+from .ratelimit import RateLimiter
+from .reconcile import Reconciler
+from .transport import HTTP2Transport, RequestsTransport, Transport
+
+
+class TimedTransport(Transport):
+    """
+    Wraps a transport and keeps the latencies of the last requests.
+    """
+
+    def __init__(self, transport, window=1000):
+        self.transport = transport
+        self._latencies = collections.deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def request(self, method, url, **kwargs):
+        started = time.time()
+        try:
+            return self.transport.request(method, url, **kwargs)
+        finally:
+            with self._lock:
+                self._latencies.append(time.time() - started)
+
+    def close(self):
+        self.transport.close()
+
+    def percentile(self, percentile):
+        with self._lock:
+            samples = sorted(self._latencies)
+        if not samples:
+            return None
+        return samples[int(round(percentile / 100.0 * (len(samples) - 1)))]
+
+
+class Reporter(object):
+    """
+    Progress callback printing throughput and request latencies to stderr.
+    """
+
+    def __init__(self, transport, stream=sys.stderr):
+        self.transport = transport
+        self.stream = stream
+        self._lock = threading.Lock()
+
+    def __call__(self, progress):
+        line = str(progress)
+        for p in (50, 95, 99):
+            latency = self.transport.percentile(p)
+            if latency is not None:
+                line = '{}, p{} {:.0f}ms'.format(line, p, latency * 1000)
+
+        with self._lock:
+            self.stream.write(line + '\n')
+            self.stream.flush()
+
+
+def make_client(args):
+    if args.http2:
+        transport = HTTP2Transport(max_connections=args.connections)
+    else:
+        transport = RequestsTransport(pool_size=args.workers)
+    transport = TimedTransport(transport)
+    rate_limiter = RateLimiter(args.rate_limit) if args.rate_limit else None
+    client = BaremetricsClient(args.token, sandbox=args.sandbox,
+                               transport=transport, rate_limiter=rate_limiter)
+    return client, Reporter(transport)
+
+
+def local_records(path, kind, errors):
+    """
+    :param errors: list extended with the (line number, error) of
+                   invalid rows while reading
+    :return: callable reading validated records of a CSV/NDJSON file,
+             as expected by Reconciler
+    """
+    fmt = detect_format(path)
+
+    def read():
+        del errors[:]
+        for line, header, rows in read_chunks(path, fmt, 1000):
+            records, invalid = parse_chunk(kind, fmt, line, header, rows)
+            errors.extend(invalid)
+            for _, record in records:
+                yield record
+    return read
+
+
+def run_export(args):
+    client, reporter = make_client(args)
+    extension = args.format
+    if args.format != 'parquet' and args.compression == 'gzip':
+        # Parquet compresses its pages internally, the file itself isn't gzip
+        extension += '.gz'
+
+    def run(kind):
+        path = os.path.join(args.output_dir, '{}.{}'.format(kind, extension))
+        count = export(client, args.source_id, kind, path, fmt=args.format,
+                       compression=args.compression, progress=reporter)
+        return kind, count
+
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        for kind, count in executor.map(run, args.kinds):
+            print('{}: {}'.format(kind, count))
+    return 0
+
+
+def run_import(args):
+    client, reporter = make_client(args)
+    importer = Importer(client, args.source_id, checkpoint=args.checkpoint,
+                        chunk_size=args.chunk_size, processes=args.processes,
+                        workers=args.workers, progress=reporter)
+    result, errors = importer.run(args.path, args.kind)
+    for line, error in errors:
+        print('line {}: {}'.format(line, error), file=sys.stderr)
+    print(', '.join('{}: {}'.format(k, v) for k, v in sorted(result.items())))
+    return 1 if errors else 0
+
+
+def run_sync(args):
+    client, reporter = make_client(args)
+    reconciler = Reconciler(client, args.source_id, args.kind,
+                            buckets=args.buckets, workers=args.workers,
+                            progress=reporter)
+    invalid = []
+    local = local_records(args.path, args.kind, invalid)
+
+    plan = reconciler.diff(local)
+    if invalid:
+        # an invalid row would look missing, and its object be deleted
+        for line, error in invalid:
+            print('line {}: {}'.format(line, error), file=sys.stderr)
+        print('Not syncing, {} has invalid rows'.format(args.path),
+              file=sys.stderr)
+        return 1
+
+    print('create: {}, update: {}, delete: {}'.format(
+        len(plan.creates), len(plan.updates), len(plan.deletes)))
+    if args.dry_run:
+        return 0
+
+    done, errors = reconciler.apply(plan, local)
+    for op, oid, error in errors:
+        print('{} {}: {}'.format(op, oid, error), file=sys.stderr)
+    print(', '.join('{}: {}'.format(k, v) for k, v in sorted(done.items())))
+    return 1 if errors else 0
+
+
+def run_purge(args):
+    client, reporter = make_client(args)
+    purger = Purger(client, args.source_id, workers=args.workers,
+                    kinds=args.kinds, progress=reporter)
+
+    if args.dry_run or not args.yes:
+        counts = purger.run(dry_run=True)
+        print(', '.join('{}: {}'.format(k, counts[k]) for k in purger.kinds))
+        if not args.dry_run:
+            print('Pass --yes to delete them', file=sys.stderr)
+            return 1
+        return 0
+
+    deleted, errors = purger.run()
+    for kind, oid, error in errors:
+        print('{} {}: {}'.format(kind, oid, error), file=sys.stderr)
+    print(', '.join('{}: {}'.format(k, deleted[k]) for k in purger.kinds))
+    return 1 if errors else 0
+
+
+def comma_list(choices):
+    def parse(value):
+        items = [item.strip() for item in value.split(',') if item.strip()]
+        unknown = [item for item in items if item not in choices]
+        if unknown:
+            raise argparse.ArgumentTypeError(
+                'unknown: {}'.format(', '.join(unknown)))
+        return items
+    return parse
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='baremetrics', description=__doc__)
+    parser.add_argument('--token', default=os.environ.get('BAREMETRICS_TOKEN'),
+                        help='API token, $BAREMETRICS_TOKEN by default')
+    parser.add_argument('--sandbox', action='store_true',
+                        help='use the sandbox API')
+    parser.add_argument('--workers', type=int, default=8,
+                        help='concurrent requests')
+    parser.add_argument('--rate-limit', type=float,
+                        help='max requests per second')
+    parser.add_argument('--http2', action='store_true',
+                        help='multiplex requests over HTTP/2')
+    parser.add_argument('--connections', type=int, default=4,
+                        help='HTTP/2 connections')
+    parser.add_argument('-v', '--verbose', action='store_true')
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    command = commands.add_parser('export',
+                                  help='export objects of a source to files')
+    command.add_argument('source_id')
+    command.add_argument('--kinds', type=comma_list(EXPORT_KINDS),
+                         default=list(EXPORT_KINDS))
+    command.add_argument('--output-dir', default='.')
+    command.add_argument('--format', choices=('ndjson', 'csv', 'parquet'),
+                         default='ndjson')
+    command.add_argument('--compression')
+    command.set_defaults(run=run_export)
+
+    command = commands.add_parser(
+        'import', help='import a CSV/NDJSON export into a source')
+    command.add_argument('source_id')
+    command.add_argument('kind', choices=sorted(IMPORT_KINDS))
+    command.add_argument('path')
+    command.add_argument('--checkpoint', help='checkpoint file to resume from')
+    command.add_argument('--chunk-size', type=int, default=1000)
+    command.add_argument('--processes', type=int,
+                         help='parser processes, one per CPU by default')
+    command.set_defaults(run=run_import)
+
+    command = commands.add_parser(
+        'sync', help='make a source match a CSV/NDJSON file')
+    command.add_argument('source_id')
+    command.add_argument('kind', choices=sorted(IMPORT_KINDS))
+    command.add_argument('path')
+    command.add_argument('--buckets', type=int, default=1024)
+    command.add_argument('--dry-run', action='store_true')
+    command.set_defaults(run=run_sync)
+
+    command = commands.add_parser('purge',
+                                  help='delete all objects of a source')
+    command.add_argument('source_id')
+    command.add_argument('--kinds', type=comma_list(PURGE_KINDS),
+                         default=list(PURGE_KINDS))
+    command.add_argument('--dry-run', action='store_true')
+    command.add_argument('--yes', action='store_true', help='really delete')
+    command.set_defaults(run=run_purge)
+
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not args.token:
+        parser.error('--token or $BAREMETRICS_TOKEN is required')
+
+    level = logging.INFO if args.verbose else logging.WARNING
+    logging.basicConfig(level=level)
+    try:
+        return args.run(args)
+    except BaremetricsException as e:
+        print(e, file=sys.stderr)
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,5 +1,7 @@
 # -*- coding: utf-8 -*-
+import copy
 import logging
+import time
 
 try:
     from urllib.parse import urlencode
@@ -10,15 +12,48 @@ except Exception:
 
 import requests
 
+from .cache import ReadStats, collection_of
+from .compression import (
+    TransferStats, accept_encoding, encode_body, endpoint_of, gzip_body,
+    response_sizes,
+)
 from .exceptions import BaremetricsAPIException, APICallNotImplemented
+from .state import StateTracker
+from .transport import RequestsTransport
 
 logger = logging.getLogger('baremetrics')
 
+ACCEPT_ENCODING = accept_encoding()
+
 
 class BaremetricsClient(object):
-    def __init__(self, token, api_version='v1', sandbox=False):
+    def __init__(self, token, api_version='v1', sandbox=False, hedging=None,
+                 track_state=False, transport=None, rate_limiter=None,
+                 compress_requests=None, cache=None):
+        """
+        :param hedging: optional HedgingPolicy applied to GET calls
+        :param track_state: remember the last known state of customers,
+                            subscriptions and plans, so updates send only
+                            changed fields and no-op updates are skipped
+        :param transport: Transport sending the requests, a pooled
+                          RequestsTransport by default
+        :param rate_limiter: optional RateLimiter throttling all requests
+                             and retrying the ones rejected with 429
+        :param compress_requests: gzip POST/PUT bodies of at least this many
+                                  bytes, None to never compress them
+        :param cache: ReadCache (or a local mirror with the same interface)
+                      serving reads called with max_staleness
+        """
         self.TOKEN = token
         self.API_VERSION = api_version
+        self.hedging = hedging
+        self.transport = transport or RequestsTransport()
+        self.rate_limiter = rate_limiter
+        self.state = StateTracker() if track_state else None
+        self.compress_requests = compress_requests
+        self.transfer_stats = TransferStats()
+        self.cache = cache
+        self.read_stats = ReadStats()
 
         if sandbox:
             self.DEBUG = True
@@ -30,23 +65,81 @@ class BaremetricsClient(object):
     def __get_headers(self):
         return {
             'Authorization': 'Bearer {}'.format(self.TOKEN),
-            'Accept': 'application/json'
+            'Accept': 'application/json',
+            'Accept-Encoding': ACCEPT_ENCODING,
         }
 
     def __get_url(self, url):
         full_url = '/'.join([self.BASE_URL, self.API_VERSION, url])
         return full_url
 
-    def __get(self, url, **params):
+    def __send(self, method, full_url, **kwargs):
+        body = encode_body(kwargs.get('data'))
+        sent = sent_uncompressed = len(body)
+
+        if (self.compress_requests is not None and
+                sent_uncompressed >= self.compress_requests):
+            kwargs['data'] = gzip_body(body)
+            kwargs['headers'] = dict(kwargs['headers'], **{
+                'Content-Encoding': 'gzip',
+                'Content-Type': 'application/x-www-form-urlencoded',
+            })
+            sent = len(kwargs['data'])
+
+        r = self.__request(method, full_url, **kwargs)
+
+        received, received_uncompressed = response_sizes(r)
+        endpoint = endpoint_of(method, full_url[len(self.__get_url('')):])
+        self.transfer_stats.record(
+            endpoint, sent, sent_uncompressed, received, received_uncompressed)
+        return r
+
+    def __throttled(self, method, full_url, **kwargs):
+        # every request on the wire takes a token, hedged duplicates included
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        return self.transport.request(method, full_url, **kwargs)
+
+    def __request(self, method, full_url, **kwargs):
+        attempt = 0
+        while True:
+            if method == 'GET' and self.hedging is not None:
+                r = self.hedging.run(
+                    self.__throttled, method, full_url, **kwargs)
+            else:
+                r = self.__throttled(method, full_url, **kwargs)
+
+            if (r.status_code != requests.codes.too_many_requests or
+                    self.rate_limiter is None or
+                    attempt >= self.rate_limiter.max_retries):
+                return r
+
+            attempt += 1
+            logger.info('Got 429 when calling {} {}, retry {}'.format(
+                method, full_url, attempt))
+            self.rate_limiter.backoff(r.headers.get('Retry-After'), attempt)
+
+    def __get(self, url, max_staleness=None, **params):
+        key = self.__join_link_with_params(url, **params)
+        if self.cache is not None and max_staleness is not None:
+            entry = self.cache.get(key)
+            if entry is not None and time.time() - entry[0] <= max_staleness:
+                self.read_stats.record(endpoint_of('GET', url), 'local')
+                return copy.deepcopy(entry[1])
+
         full_url = self.__get_url(url)
         headers = self.__get_headers()
 
         if self.DEBUG:
             logger.info('Sending GET {} to {}'.format(params, full_url))
 
-        r = requests.get(full_url, headers=headers, params=params)
+        r = self.__send('GET', full_url, headers=headers, params=params)
         if r.status_code == requests.codes.ok:
-            return r.json()
+            data = r.json()
+            self.read_stats.record(endpoint_of('GET', url), 'remote')
+            if self.cache is not None:
+                self.cache.set(key, copy.deepcopy(data))
+            return data
         raise BaremetricsAPIException(r)
 
     def __post(self, url, data):
@@ -56,8 +149,9 @@ class BaremetricsClient(object):
         if self.DEBUG:
             logger.info('Sending POST {} to {}'.format(data, full_url))
 
-        r = requests.post(full_url, headers=headers, data=data)
+        r = self.__send('POST', full_url, headers=headers, data=data)
         if r.status_code == requests.codes.ok:
+            self.__invalidate(url)
             return r.json()
         raise BaremetricsAPIException(r)
 
@@ -68,8 +162,9 @@ class BaremetricsClient(object):
         if self.DEBUG:
             logger.info('Sending PUT {} to {}'.format(data, full_url))
 
-        r = requests.put(full_url, headers=headers, data=data)
+        r = self.__send('PUT', full_url, headers=headers, data=data)
         if r.status_code == requests.codes.ok:
+            self.__invalidate(url)
             return r.json()
         raise BaremetricsAPIException(r)
 
@@ -80,8 +175,9 @@ class BaremetricsClient(object):
         if self.DEBUG:
             logger.info('Sending DELETE to {}'.format(full_url))
 
-        r = requests.delete(full_url, headers=headers)
+        r = self.__send('DELETE', full_url, headers=headers)
         if r.status_code in (requests.codes.ok, requests.codes.accepted,):
+            self.__invalidate(url)
             return r.json()
         raise BaremetricsAPIException(r)
 
@@ -91,9 +187,39 @@ class BaremetricsClient(object):
             link = '{}?{}'.format(link, query)
         return link
 
+    def __invalidate(self, url):
+        if self.cache is not None:
+            self.cache.invalidate(collection_of(url))
+
+    def __remember(self, kind, source_id, response):
+        if self.state is not None:
+            self.state.remember_response(kind, source_id, response)
+        return response
+
+    def __forget(self, kind, source_id, oid, response):
+        if self.state is not None:
+            self.state.forget(kind, source_id, oid)
+        return response
+
+    def __update(self, kind, source_id, oid, url, data, required=()):
+        if self.state is None:
+            return self.__put(url, data)
+
+        changes = self.state.diff(kind, source_id, oid, data)
+        if not changes:
+            self.state.skip(kind)
+            return {kind: self.state.get(kind, source_id, oid)}
+
+        for key in required:
+            changes[key] = data[key]
+
+        response = self.__put(url, changes)
+        self.state.remember(kind, source_id, dict(changes, oid=oid))
+        return response
+
     # account
 
-    def get_account(self):
+    def get_account(self, max_staleness=None):
         """
         :return:
         {
@@ -123,11 +249,11 @@ class BaremetricsClient(object):
           }
         }
         """
-        return self.__get('account')
+        return self.__get('account', max_staleness=max_staleness)
 
     # sources
 
-    def list_sources(self):
+    def list_sources(self, max_staleness=None):
         """
         :return:
         {
@@ -145,11 +271,11 @@ class BaremetricsClient(object):
           ]
         }
         """
-        return self.__get('sources')
+        return self.__get('sources', max_staleness=max_staleness)
 
     # plans
 
-    def list_plans(self, source_id):
+    def list_plans(self, source_id, max_staleness=None, **kwargs):
         """
         :param source_id: Source ID
         :return:
@@ -201,9 +327,12 @@ class BaremetricsClient(object):
         }
 
         """
-        return self.__get('{}/plans'.format(source_id))
+        url = '{}/plans'.format(source_id)
+        url = self.__join_link_with_params(url, **kwargs)
+        response = self.__get(url, max_staleness=max_staleness)
+        return self.__remember('plan', source_id, response)
 
-    def show_plan(self, source_id, plan_id):
+    def show_plan(self, source_id, plan_id, max_staleness=None):
         """
         :param source_id: Source ID
         :param plan_id: Plan ID
@@ -232,91 +361,123 @@ class BaremetricsClient(object):
           }
         }
         """
-        return self.__get('{}/plans/{}'.format(source_id, plan_id))
+        url = '{}/plans/{}'.format(source_id, plan_id)
+        response = self.__get(url, max_staleness=max_staleness)
+        return self.__remember('plan', source_id, response)
 
     def update_plan(self, source_id, oid, name):
-        return self.__put('{}/plans/{}'.format(source_id, oid), data={'name': name})
+        url = '{}/plans/{}'.format(source_id, oid)
+        return self.__update('plan', source_id, oid, url, data={'name': name})
 
     def create_plan(self, source_id, oid, name, currency, amount, interval, interval_count):
-        return self.__post('{}/plans'.format(source_id), data={
+        data = {
             'oid': oid,
             'name': name,
             'currency': currency,
             'amount': amount,
             'interval': interval,
             'interval_count': interval_count
-        })
+        }
+        response = self.__post('{}/plans'.format(source_id), data=data)
+        self.__remember('plan', source_id, {'plan': data})
+        return response
 
     def delete_plan(self, source_id, oid):
-        return self.__delete('{}/plans/{}'.format(source_id, oid))
+        response = self.__delete('{}/plans/{}'.format(source_id, oid))
+        return self.__forget('plan', source_id, oid, response)
 
     # customers
 
-    def list_customers(self, source_id, **kwargs):
+    def list_customers(self, source_id, max_staleness=None, **kwargs):
         url = '{}/customers'.format(source_id)
         url = self.__join_link_with_params(url, **kwargs)
-        return self.__get(url)
+        response = self.__get(url, max_staleness=max_staleness)
+        return self.__remember('customer', source_id, response)
 
-    def show_customer(self, source_id, oid):
-        return self.__get('{}/customers/{}'.format(source_id, oid))
+    def show_customer(self, source_id, oid, max_staleness=None):
+        url = '{}/customers/{}'.format(source_id, oid)
+        response = self.__get(url, max_staleness=max_staleness)
+        return self.__remember('customer', source_id, response)
 
-    def show_customer_events(self, source_id, oid):
-        return self.__get('{}/customers/{}/events'.format(source_id, oid))
+    def show_customer_events(self, source_id, oid, max_staleness=None):
+        url = '{}/customers/{}/events'.format(source_id, oid)
+        return self.__get(url, max_staleness=max_staleness)
 
     def update_customer(self, source_id, customer_oid, **kwargs):
         data = {k: v for k, v in kwargs.items() if v is not None}
-        return self.__put('{}/customers/{}'.format(source_id, customer_oid), data)
+        url = '{}/customers/{}'.format(source_id, customer_oid)
+        return self.__update('customer', source_id, customer_oid, url, data)
 
     def create_customer(self, source_id, **kwargs):
         data = {k: v for k, v in kwargs.items() if v is not None}
-        return self.__post('{}/customers'.format(source_id), data)
+        response = self.__post('{}/customers'.format(source_id), data)
+        self.__remember('customer', source_id, {'customer': data})
+        return response
 
     def delete_customer(self, source_id, oid):
-        return self.__delete('{}/customers/{}'.format(source_id, oid))
+        response = self.__delete('{}/customers/{}'.format(source_id, oid))
+        return self.__forget('customer', source_id, oid, response)
 
     # subscriptions
 
-    def list_subscriptions(self, source_id, customer_oid=None, **kwargs):
+    def list_subscriptions(self, source_id, customer_oid=None,
+                           max_staleness=None, **kwargs):
         url = '{}/subscriptions'.format(source_id)
         if customer_oid:
             url = '{}?customer_oid={}'.format(url, customer_oid)
 
         url = self.__join_link_with_params(url, **kwargs)
-        return self.__get(url)
+        response = self.__get(url, max_staleness=max_staleness)
+        return self.__remember('subscription', source_id, response)
 
-    def show_subscription(self, source_id, oid):
-        return self.__get('{}/subscriptions/{}'.format(source_id, oid))
+    def show_subscription(self, source_id, oid, max_staleness=None):
+        url = '{}/subscriptions/{}'.format(source_id, oid)
+        response = self.__get(url, max_staleness=max_staleness)
+        return self.__remember('subscription', source_id, response)
 
     def update_subscription(self, source_id, subscription_oid, plan_oid, **kwargs):
         data = {k: v for k, v in kwargs.items() if v is not None}
         data.update({
             'plan_oid': plan_oid
         })
-        return self.__put(
+        return self.__update(
+            'subscription', source_id, subscription_oid,
             '{}/subscriptions/{}'.format(source_id, subscription_oid),
-            data)
+            data, required=('plan_oid',))
 
     def cancel_subscription(self, source_id, subscription_oid, canceled_at):
-        return self.__put(
+        response = self.__put(
             '{}/subscriptions/{}/cancel'.format(source_id, subscription_oid),
             data={'canceled_at': canceled_at})
+        self.__remember('subscription', source_id, {
+            'subscription': {
+                'oid': subscription_oid,
+                'canceled_at': canceled_at,
+            }
+        })
+        return response
 
     def create_subscription(self, source_id, **kwargs):
         data = {k: v for k, v in kwargs.items() if v is not None}
-        return self.__post('{}/subscriptions'.format(source_id), data)
+        response = self.__post('{}/subscriptions'.format(source_id), data)
+        self.__remember('subscription', source_id, {'subscription': data})
+        return response
 
     def delete_subscription(self, source_id, subscription_oid, **kwargs):
         url = '{}/subscriptions/{}'.format(source_id, subscription_oid)
         url = self.__join_link_with_params(url, **kwargs)
-        return self.__delete(url)
+        response = self.__delete(url)
+        return self.__forget('subscription', source_id, subscription_oid,
+                             response)
 
     # annotations
 
-    def list_annotations(self):
-        return self.__get('annotations')
+    def list_annotations(self, max_staleness=None):
+        return self.__get('annotations', max_staleness=max_staleness)
 
-    def show_annotation(self, annotation_id):
-        return self.__get('annotations/{}'.format(annotation_id))
+    def show_annotation(self, annotation_id, max_staleness=None):
+        url = 'annotations/{}'.format(annotation_id)
+        return self.__get(url, max_staleness=max_staleness)
 
     def create_annotation(self, **kwargs):
         data = {k: v for k, v in kwargs.items() if v is not None}
@@ -341,21 +502,22 @@ class BaremetricsClient(object):
 
     # users
 
-    def list_users(self):
-        return self.__get('users')
+    def list_users(self, max_staleness=None):
+        return self.__get('users', max_staleness=max_staleness)
 
-    def show_user(self, oid):
-        return self.__get_url('users/{}'.format(oid))
+    def show_user(self, oid, max_staleness=None):
+        return self.__get('users/{}'.format(oid), max_staleness=max_staleness)
 
     # charges
 
-    def list_charges(self, source_id, **kwargs):
+    def list_charges(self, source_id, max_staleness=None, **kwargs):
         url = '{}/charges'.format(source_id)
         url = self.__join_link_with_params(url, **kwargs)
-        return self.__get(url)
+        return self.__get(url, max_staleness=max_staleness)
 
-    def show_charge(self, source_id, oid):
-        return self.__get('{}/charges/{}'.format(source_id, oid))
+    def show_charge(self, source_id, oid, max_staleness=None):
+        url = '{}/charges/{}'.format(source_id, oid)
+        return self.__get(url, max_staleness=max_staleness)
 
     def create_charge(self, source_id, **kwargs):
         data = {k: v for k, v in kwargs.items() if v is not None}
@@ -366,11 +528,14 @@ class BaremetricsClient(object):
 
     # events
 
-    def list_events(self, source_id):
-        return self.__get('{}/events'.format(source_id))
+    def list_events(self, source_id, max_staleness=None, **kwargs):
+        url = '{}/events'.format(source_id)
+        url = self.__join_link_with_params(url, **kwargs)
+        return self.__get(url, max_staleness=max_staleness)
 
-    def show_event(self, source_id, oid):
-        return self.__get('{}/events/{}'.format(source_id, oid))
+    def show_event(self, source_id, oid, max_staleness=None):
+        url = '{}/events/{}'.format(source_id, oid)
+        return self.__get(url, max_staleness=max_staleness)
 
     # metrics
 
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+import collections
+import gzip
+import io
+import threading
+
+try:
+    from urllib.parse import urlencode, urlparse
+except Exception:
+    from urllib import urlencode
+    from urlparse import urlparse
+
+# path segments naming resources, every other segment is an id
+RESOURCES = frozenset([
+    'account', 'sources', 'plans', 'customers', 'subscriptions', 'cancel',
+    'annotations', 'goals', 'users', 'charges', 'events', 'metrics',
+])
+
+
+def accept_encoding():
+    """
+    :return: Accept-Encoding value, with brotli when a decoder is installed
+    """
+    for module in ('brotli', 'brotlicffi'):
+        try:
+            __import__(module)
+        except ImportError:
+            continue
+        return 'gzip, deflate, br'
+    return 'gzip, deflate'
+
+
+def encode_body(data):
+    if data is None:
+        return b''
+    if isinstance(data, bytes):
+        return data
+    return urlencode(data).encode('utf-8')
+
+
+def gzip_body(body):
+    buf = io.BytesIO()
+    with gzip.GzipFile(fileobj=buf, mode='wb') as f:
+        f.write(body)
+    return buf.getvalue()
+
+
+def endpoint_of(method, path):
+    """
+    :return: endpoint name with ids replaced, e.g. 'GET {id}/customers/{id}'
+    """
+    path = urlparse(path).path.strip('/')
+    segments = [s if s in RESOURCES else '{id}' for s in path.split('/') if s]
+    return '{} {}'.format(method, '/'.join(segments))
+
+
+def response_sizes(r):
+    """
+    :return: (bytes on the wire, decoded bytes) of a requests or httpx response
+    """
+    decoded = len(r.content)
+
+    wire = getattr(r, 'num_bytes_downloaded', None)  # httpx
+    if wire is None:
+        # requests, urllib3 counts bytes read off the socket
+        raw = getattr(r, 'raw', None)
+        wire = raw.tell() if hasattr(raw, 'tell') else None
+    if not wire:
+        length = r.headers.get('Content-Length')
+        wire = int(length) if length and length.isdigit() else decoded
+    return wire, decoded
+
+
+class TransferStats(object):
+    """
+    Compressed (on the wire) and uncompressed byte counts per endpoint.
+    """
+
+    FIELDS = ('requests', 'sent', 'sent_uncompressed', 'received',
+              'received_uncompressed')
+
+    def __init__(self):
+        self._stats = collections.defaultdict(collections.Counter)
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, sent, sent_uncompressed, received,
+               received_uncompressed):
+        with self._lock:
+            stats = self._stats[endpoint]
+            stats['requests'] += 1
+            stats['sent'] += sent
+            stats['sent_uncompressed'] += sent_uncompressed
+            stats['received'] += received
+            stats['received_uncompressed'] += received_uncompressed
+
+    def by_endpoint(self):
+        with self._lock:
+            return {endpoint: dict(stats)
+                    for endpoint, stats in self._stats.items()}
+
+    def totals(self):
+        totals = collections.Counter()
+        for stats in self.by_endpoint().values():
+            totals.update(stats)
+        return dict(totals)
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+import threading
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from .exceptions import BaremetricsException
+
+# currencies with a subunit_to_unit other than 100
+SUBUNIT_TO_UNIT = {
+    'BIF': 1, 'CLP': 1, 'DJF': 1, 'GNF': 1, 'ISK': 1, 'JPY': 1, 'KMF': 1,
+    'KRW': 1, 'PYG': 1, 'RWF': 1, 'UGX': 1, 'VND': 1, 'VUV': 1, 'XAF': 1,
+    'XOF': 1, 'XPF': 1,
+    'BHD': 1000, 'IQD': 1000, 'JOD': 1000, 'KWD': 1000, 'LYD': 1000,
+    'OMR': 1000, 'TND': 1000,
+}
+
+
+def currency_code(currency):
+    """
+    :param currency: ISO code or currency object as returned by the API
+    """
+    if isinstance(currency, dict):
+        currency = currency.get('iso_code') or currency.get('id')
+    return str(currency).upper()
+
+
+class CurrencyNormalizer(object):
+    """
+    Converts amounts in subunits (cents) of any currency to subunits of
+    the account default currency.
+
+    The default currency is read once from get_account and cached. Batches
+    are converted with one multiplication per batch when numpy is installed,
+    and with one dict lookup per amount otherwise.
+
+    subunit_to_unit comes from the ``subunits`` overrides first, then from
+    the currency objects returned by the API, including the account default
+    currency, and from SUBUNIT_TO_UNIT for currencies given as ISO codes.
+    """
+
+    def __init__(self, client, rates=None, subunits=None):
+        """
+        :param rates: mapping of ISO code to the value of one unit of that
+                      currency in units of the default currency
+        :param subunits: subunit_to_unit overrides, per ISO code
+        """
+        self.client = client
+        self.subunits = dict(SUBUNIT_TO_UNIT)
+        self._overrides = {currency_code(k): int(v)
+                           for k, v in (subunits or {}).items()}
+        self._rates = {}
+        self._factors = {}
+        self._default = None
+        self._lock = threading.Lock()
+        self.set_rates(rates or {})
+
+    @property
+    def default_currency(self):
+        with self._lock:
+            if self._default is None:
+                account = self.client.get_account()['account']
+                self._default = account['default_currency']
+            default = self._default
+        self._learn(default)
+        return default
+
+    def set_rates(self, rates):
+        with self._lock:
+            self._rates = {currency_code(k): float(v)
+                           for k, v in rates.items()}
+            self._factors = {}
+
+    def _learn(self, currency):
+        """
+        Keeps the subunit_to_unit of a currency object returned by the API.
+        """
+        if not isinstance(currency, dict):
+            return
+        if not currency.get('subunit_to_unit'):
+            return
+        code = currency_code(currency)
+        value = int(currency['subunit_to_unit'])
+        if self.subunits.get(code) != value:
+            with self._lock:
+                self.subunits[code] = value
+                self._factors = {}
+
+    def _subunits(self, code):
+        if code in self._overrides:
+            return self._overrides[code]
+        return self.subunits.get(code, 100)
+
+    def factor(self, currency):
+        """
+        :return: multiplier from subunits of currency to subunits of the
+                 default currency
+        """
+        self._learn(currency)
+        code = currency_code(currency)
+        factor = self._factors.get(code)
+        if factor is not None:
+            return factor
+
+        default_code = currency_code(self.default_currency)
+        if code == default_code:
+            factor = 1.0
+        elif code in self._rates:
+            factor = (self._rates[code] * self._subunits(default_code) /
+                      self._subunits(code))
+        else:
+            raise BaremetricsException('No exchange rate for {}'.format(code))
+
+        self._factors[code] = factor
+        return factor
+
+    def normalize(self, amounts, currencies):
+        """
+        :param amounts: amounts in subunits of their currency
+        :param currencies: currency of each amount
+        :return: amounts in subunits of the default currency, as a float
+                 numpy array if numpy is installed, as a list otherwise
+        """
+        if numpy is None:
+            factor = self.factor
+            return [amount * factor(currency)
+                    for amount, currency in zip(amounts, currencies)]
+
+        values = numpy.asarray(currencies)
+        if values.dtype.kind not in 'US':
+            # currency objects, reduce them to codes first
+            for currency in currencies:
+                self._learn(currency)
+            values = numpy.asarray([currency_code(c) for c in currencies])
+        codes, inverse = numpy.unique(values, return_inverse=True)
+        factors = numpy.array([self.factor(code) for code in codes],
+                              dtype=float)
+        return numpy.asarray(amounts, dtype=float) * factors[inverse]
+
+    def normalize_charges(self, charges):
+        """
+        :param charges: charges as returned by list_charges
+        """
+        amounts = []
+        currencies = []
+        for charge in charges:
+            amounts.append(charge['amount'])
+            currencies.append(charge['currency'])
+        return self.normalize(amounts, currencies)
+
+    def normalize_plans(self, plans):
+        """
+        Takes each plan's amount in the default currency when it has one,
+        and converts its first amount otherwise.
+
+        :param plans: plans as returned by list_plans
+        """
+        default_code = currency_code(self.default_currency)
+        amounts = []
+        currencies = []
+        for plan in plans:
+            options = (plan.get('amounts') or
+                       [{'amount': 0, 'currency': default_code}])
+            chosen = next((a for a in options
+                           if currency_code(a['currency']) == default_code),
+                          options[0])
+            amounts.append(chosen['amount'])
+            currencies.append(chosen['currency'])
+        return self.normalize(amounts, currencies)
+
+    def total(self, amounts, currencies):
+        """
+        :return: sum of the amounts in subunits of the default currency
+        """
+        normalized = self.normalize(amounts, currencies)
+        if numpy is None:
+            return float(sum(normalized))
+        return float(normalized.sum())
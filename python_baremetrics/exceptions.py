@@ -1,7 +1,5 @@
 # -*- coding: utf-8 -*-
 
-from simplejson import JSONDecodeError
-
 
 class BaremetricsException(Exception):
     pass
@@ -11,11 +9,17 @@ class APICallNotImplemented(BaremetricsException):
     pass
 
 
+class RecreateFailed(BaremetricsException):
+    # the object was deleted to be created again, and the create failed
+    pass
+
+
 class BaremetricsAPIException(BaremetricsException):
     def __init__(self, r_message):
+        self.status_code = r_message.status_code
         try:
             json_data = r_message.json()
-        except JSONDecodeError:
+        except ValueError:
             error = r_message.text
         else:
             error = json_data.get('error')
@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+import csv
+import gzip
+import io
+import json
+import logging
+
+from .exceptions import BaremetricsException
+from .helpers import paginate
+from .progress import Progress
+
+logger = logging.getLogger('baremetrics')
+
+# kinds that can be exported, all of them are listed per source
+KINDS = ('customers', 'subscriptions', 'charges', 'plans', 'events')
+
+
+def open_text(path, compression=None):
+    if compression == 'gzip' or (compression is None and path.endswith('.gz')):
+        return io.TextIOWrapper(gzip.open(path, 'wb'), encoding='utf-8',
+                                newline='')
+    if compression is not None:
+        raise BaremetricsException(
+            'Unsupported compression {}'.format(compression))
+    return io.open(path, 'w', encoding='utf-8', newline='')
+
+
+def flat_value(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, sort_keys=True)
+    return value
+
+
+class NDJSONWriter(object):
+    def __init__(self, path, compression=None):
+        self._file = open_text(path, compression)
+
+    def write(self, record):
+        self._file.write(json.dumps(record, sort_keys=True))
+        self._file.write('\n')
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class CSVWriter(object):
+    """
+    Nested values are written as JSON. Without ``fieldnames`` the columns
+    are the keys of the first record, and keys missing from it are dropped.
+    """
+
+    def __init__(self, path, fieldnames=None, compression=None):
+        self._file = open_text(path, compression)
+        self._fieldnames = fieldnames
+        self._writer = None
+
+    def write(self, record):
+        if self._writer is None:
+            fieldnames = self._fieldnames or sorted(record)
+            self._writer = csv.DictWriter(self._file, fieldnames,
+                                          extrasaction='ignore')
+            self._writer.writeheader()
+        self._writer.writerow({k: flat_value(v) for k, v in record.items()})
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ParquetWriter(object):
+    """
+    Buffers ``row_group_size`` records and writes them as one row group.
+    Nested values are written as JSON. Requires pyarrow.
+
+    Without a ``schema`` it is inferred from the first row group. Columns
+    that are empty in the whole first group become strings, and later values
+    in string columns are written as text. A field missing from the schema,
+    or a value that can't be converted to its column type, raises
+    BaremetricsException instead of being dropped. The rows written until
+    then stay readable, the file is always closed with a footer.
+    """
+
+    def __init__(self, path, row_group_size=10000, compression='snappy',
+                 schema=None):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise BaremetricsException('Parquet export requires pyarrow')
+
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        self._path = path
+        self._compression = compression
+        self._row_group_size = row_group_size
+        self._schema = schema
+        self._rows = []
+        self._writer = None
+
+    def write(self, record):
+        self._rows.append({k: flat_value(v) for k, v in record.items()})
+        if len(self._rows) >= self._row_group_size:
+            self._flush()
+
+    def _flush(self):
+        # take the rows first, so a failed row group isn't written again
+        rows, self._rows = self._rows, []
+        if not rows:
+            return
+        if self._schema is None:
+            self._schema = self._infer_schema(rows)
+        if self._writer is None:
+            self._writer = self._pq.ParquetWriter(
+                self._path, self._schema, compression=self._compression)
+
+        names = set(self._schema.names)
+        strings = [f.name for f in self._schema
+                   if self._pa.types.is_string(f.type)]
+        for row in rows:
+            unknown = set(row) - names
+            if unknown:
+                raise BaremetricsException(
+                    'Fields {} are not in the Parquet schema of {}'.format(
+                        ', '.join(sorted(unknown)), self._path))
+            for name in strings:
+                value = row.get(name)
+                if value is not None and not isinstance(value, str):
+                    row[name] = str(value)
+
+        try:
+            table = self._pa.Table.from_pylist(rows, schema=self._schema)
+        except self._pa.ArrowException as e:
+            raise BaremetricsException(
+                'Cannot write column {} of {}: {}'.format(
+                    self._bad_column(rows), self._path, e))
+        self._writer.write_table(table)
+
+    def _bad_column(self, rows):
+        for field in self._schema:
+            try:
+                self._pa.array([row.get(field.name) for row in rows],
+                               type=field.type)
+            except self._pa.ArrowException:
+                return field.name
+        return None
+
+    def _infer_schema(self, rows):
+        names = []
+        for row in rows:
+            names.extend(k for k in row if k not in names)
+        columns = {name: [row.get(name) for row in rows] for name in names}
+        inferred = self._pa.Table.from_pydict(columns).schema
+        fields = []
+        for name in names:
+            field = inferred.field(name)
+            if self._pa.types.is_null(field.type):
+                field = field.with_type(self._pa.string())
+            fields.append(field)
+        return self._pa.schema(fields)
+
+    def close(self):
+        try:
+            self._flush()
+        finally:
+            if self._writer is not None:
+                self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        if exc_type is not None:
+            # don't write the rest after a failure, only close the file
+            self._rows = []
+        self.close()
+
+
+WRITERS = {
+    'ndjson': NDJSONWriter,
+    'csv': CSVWriter,
+    'parquet': ParquetWriter,
+}
+
+
+def detect_format(path):
+    name = path[:-3] if path.endswith('.gz') else path
+    for fmt, extensions in (('ndjson', ('.ndjson', '.jsonl')),
+                            ('csv', ('.csv',)),
+                            ('parquet', ('.parquet',))):
+        if name.endswith(extensions):
+            return fmt
+    raise BaremetricsException('Cannot detect format of {}'.format(path))
+
+
+def export(client, source_id, kind, path, fmt=None, compression=None,
+           per_page=100, progress=None, **options):
+    """
+    Streams all objects of a kind from a source into a file, one page at
+    a time, so memory use doesn't depend on the size of the account.
+
+    :param kind: one of KINDS
+    :param fmt: 'ndjson', 'csv' or 'parquet', detected from path by default
+    :param compression: 'gzip' for NDJSON/CSV, a pyarrow codec for Parquet,
+                        the writer's default if None
+    :param progress: callable called with a Progress object
+    :param options: passed to the writer, e.g. row_group_size, schema or
+                    fieldnames
+    :return: number of exported objects
+    """
+    if kind not in KINDS:
+        raise BaremetricsException('Cannot export {}'.format(kind))
+    fmt = fmt or detect_format(path)
+    if fmt not in WRITERS:
+        raise BaremetricsException('Unsupported format {}'.format(fmt))
+
+    method = getattr(client, 'list_{}'.format(kind))
+    counter = Progress(callback=progress, unit=kind)
+
+    if compression is not None:
+        options['compression'] = compression
+
+    with WRITERS[fmt](path, **options) as writer:
+        for record in paginate(method, kind, source_id, per_page=per_page):
+            writer.write(record)
+            counter.add()
+
+    counter.finish()
+    logger.info('Exported {} to {}'.format(counter, path))
+    return counter.count
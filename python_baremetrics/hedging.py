@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+import collections
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+
+class HedgingPolicy(object):
+    """
+    Hedged requests for idempotent calls.
+
+    The primary request is sent immediately. If it hasn't finished after
+    the ``percentile``-th latency observed so far, a duplicate is sent and
+    whichever finishes first wins. Hedges are only sent while the number
+    of hedges stays below ``budget`` times the number of requests, so
+    hedging never adds more than that fraction of extra load.
+
+    ``requests`` calls can't be interrupted once they are on the wire, so
+    the losing request is cancelled if it hasn't started yet, and its
+    response is closed and discarded otherwise.
+
+    Requests run on a pool of ``max_workers`` threads. The hedge delay
+    counts from the moment the primary starts running, so time spent
+    queued for a thread never triggers a hedge, but hedges still queue
+    behind busy threads: size ``max_workers`` to about twice the number
+    of threads sharing the client.
+    """
+
+    def __init__(self, percentile=95, budget=0.05, min_delay=0.01,
+                 max_delay=None, min_samples=20, window=1000, max_workers=16):
+        if not 0 < percentile < 100:
+            raise ValueError('percentile must be between 0 and 100')
+        if budget < 0:
+            raise ValueError('budget must not be negative')
+
+        self.percentile = percentile
+        self.budget = budget
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.min_samples = min_samples
+
+        self._latencies = collections.deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def delay(self):
+        """
+        :return: seconds to wait before hedging, None while there are not
+                 enough latency samples to estimate it
+        """
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            samples = sorted(self._latencies)
+
+        index = int(round(self.percentile / 100.0 * (len(samples) - 1)))
+        delay = max(samples[index], self.min_delay)
+        if self.max_delay is not None:
+            delay = min(delay, self.max_delay)
+        return delay
+
+    def stats(self):
+        return {
+            'requests': self.requests,
+            'hedges': self.hedges,
+            'hedge_wins': self.hedge_wins,
+            'delay': self.delay(),
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+    def run(self, fn, *args, **kwargs):
+        """
+        Calls ``fn(*args, **kwargs)``, hedging it if it is slow.
+
+        :return: result of the first call to succeed
+        """
+        delay = self.delay()
+        running = threading.Event()
+        started = []
+
+        def call():
+            started.append(time.time())
+            running.set()
+            return fn(*args, **kwargs)
+
+        with self._lock:
+            self.requests += 1
+
+        primary = self._executor.submit(call)
+        # don't count the time spent waiting for a free thread
+        running.wait()
+        started = started[0]
+
+        if delay is None:
+            return self._finish(primary, started)
+        remaining = max(delay - (time.time() - started), 0)
+        if wait([primary], timeout=remaining).done:
+            return self._finish(primary, started)
+
+        if not self._acquire_hedge():
+            return self._finish(primary, started)
+
+        hedge = self._executor.submit(fn, *args, **kwargs)
+        pending = {primary, hedge}
+        error = None
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    error = future.exception()
+                    continue
+
+                for loser in pending:
+                    self._discard(loser)
+                if future is hedge:
+                    with self._lock:
+                        self.hedge_wins += 1
+                self._record(time.time() - started)
+                return future.result()
+
+        raise error
+
+    def _acquire_hedge(self):
+        with self._lock:
+            if self.hedges + 1 > self.budget * self.requests:
+                return False
+            self.hedges += 1
+            return True
+
+    def _finish(self, future, started):
+        result = future.result()
+        self._record(time.time() - started)
+        return result
+
+    def _record(self, latency):
+        with self._lock:
+            self._latencies.append(latency)
+
+    @staticmethod
+    def _discard(future):
+        if future.cancel():
+            return
+
+        def close(f):
+            if f.exception() is None and hasattr(f.result(), 'close'):
+                f.result().close()
+
+        future.add_done_callback(close)
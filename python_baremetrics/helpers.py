@@ -2,3 +2,25 @@
 
 from .client import BaremetricsClient
 from .exceptions import BaremetricsException
+
+
+def paginate(method, key, *args, **kwargs):
+    """
+    Iterates over all objects of a paginated list_* call.
+
+    :param method: bound client method, e.g. client.list_customers
+    :param key: collection key in the response, e.g. 'customers'
+    :param per_page: page size, 100 by default
+    """
+    kwargs.setdefault('per_page', 100)
+    page = kwargs.pop('page', 0)
+
+    while True:
+        response = method(*args, page=page, **kwargs)
+        for item in response.get(key) or []:
+            yield item
+
+        pagination = (response.get('meta') or {}).get('pagination') or {}
+        if not pagination.get('has_more'):
+            return
+        page += 1
@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+import collections
+import csv
+import io
+import json
+import logging
+import multiprocessing
+import os
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from .exceptions import BaremetricsException
+from .progress import Progress
+
+logger = logging.getLogger('baremetrics')
+
+REQUIRED = {
+    'customer': ('oid',),
+    'subscription': ('oid', 'plan_oid', 'customer_oid', 'started_at'),
+    'charge': ('oid', 'customer_oid', 'amount', 'currency'),
+}
+
+INTEGER_FIELDS = ('amount', 'quantity', 'created', 'started_at',
+                  'canceled_at', 'discount')
+
+
+def detect_format(path):
+    if path.endswith('.csv'):
+        return 'csv'
+    if path.endswith(('.ndjson', '.jsonl')):
+        return 'ndjson'
+    raise BaremetricsException('Cannot detect format of {}'.format(path))
+
+
+def read_chunks(path, fmt, chunk_size):
+    """
+    Splits an export into chunks without parsing the rows.
+
+    :return: iterator of (first line number, header, rows), where rows are
+             raw lines for NDJSON and field lists for CSV
+    """
+    with io.open(path, encoding='utf-8', newline='') as f:
+        if fmt == 'csv':
+            rows = csv.reader(f)
+            header = next(rows, None)
+            line = 2
+        else:
+            rows = f
+            header = None
+            line = 1
+
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) == chunk_size:
+                yield line, header, chunk
+                line += len(chunk)
+                chunk = []
+        if chunk:
+            yield line, header, chunk
+
+
+def parse_chunk(kind, fmt, line, header, rows):
+    """
+    Parses and validates a chunk, runs in a worker process.
+
+    :return: (list of (line number, record), list of (line number, error))
+    """
+    records = []
+    errors = []
+    for number, row in enumerate(rows, line):
+        try:
+            if fmt == 'csv':
+                record = dict(zip(header, row))
+            else:
+                if not row.strip():
+                    continue
+                record = json.loads(row)
+                if not isinstance(record, dict):
+                    raise ValueError('not an object')
+
+            record = {k: v for k, v in record.items() if v not in (None, '')}
+            for field in INTEGER_FIELDS:
+                if field in record:
+                    try:
+                        record[field] = int(record[field])
+                    except (TypeError, ValueError):
+                        raise ValueError('{} is not an integer'.format(field))
+
+            missing = [f for f in REQUIRED[kind] if f not in record]
+            if missing:
+                raise ValueError('missing {}'.format(', '.join(missing)))
+        except ValueError as e:
+            errors.append((number, str(e)))
+        else:
+            records.append((number, record))
+    return records, errors
+
+
+class Importer(object):
+    """
+    Parallel, resumable import of historical customers, subscriptions
+    or charges from CSV or NDJSON exports.
+
+    The input is split into chunks which are parsed and validated in
+    a process pool and uploaded by a pool of writer threads. Every chunk
+    whose rows were all uploaded is recorded in the checkpoint file, and
+    a restarted import skips those chunks. Rows of a chunk that had failed
+    uploads, or was interrupted by a crash, are sent again.
+    Chunks are numbered by position, so an import can only be resumed with
+    the chunk size it was started with.
+    """
+
+    def __init__(self, client, source_id, checkpoint=None, chunk_size=1000,
+                 processes=None, workers=8, progress=None):
+        """
+        :param checkpoint: path of the checkpoint file, no resuming if None
+        :param progress: callable called with a Progress object,
+                         logs rows/sec and ETA by default
+        """
+        self.client = client
+        self.source_id = source_id
+        self.checkpoint = checkpoint
+        self.chunk_size = chunk_size
+        self.processes = processes or multiprocessing.cpu_count()
+        self.workers = workers
+        self.progress = progress or (
+            lambda p: logger.info('Imported {}'.format(p)))
+
+    def run(self, path, kind, fmt=None):
+        """
+        :param kind: 'customer', 'subscription' or 'charge'
+        :return: (Counter of imported/skipped/invalid/failed rows,
+                  list of (line number, error)); blank NDJSON lines are
+                 counted as skipped
+        """
+        if kind not in REQUIRED:
+            raise BaremetricsException('Cannot import {}'.format(kind))
+        fmt = fmt or detect_format(path)
+
+        key = '{}:{}'.format(kind, os.path.abspath(path))
+        done_chunks = self._done_chunks(key)
+        progress = Progress(total=self._count_rows(path, fmt),
+                            callback=self.progress)
+        result = collections.Counter()
+        errors = []
+
+        create = getattr(self.client, 'create_{}'.format(kind))
+        in_flight = collections.deque()
+
+        def upload(index, future, size, writers):
+            records, invalid = future.result()
+            uploads = [(number, writers.submit(create, self.source_id,
+                                               **record))
+                       for number, record in records]
+            failed = 0
+            for number, pending in uploads:
+                try:
+                    pending.result()
+                except Exception as e:
+                    # connection errors too, the chunk is retried on resume
+                    errors.append((number, str(e)))
+                    failed += 1
+                else:
+                    result['imported'] += 1
+                progress.add()
+
+            errors.extend(invalid)
+            result['invalid'] += len(invalid)
+            progress.add(len(invalid))
+
+            blank = size - len(records) - len(invalid)
+            if blank:
+                result['skipped'] += blank
+                progress.add(blank)
+
+            if failed:
+                result['failed'] += failed
+            else:
+                done_chunks.add(index)
+                self._save_checkpoint(key, done_chunks)
+
+        chunks = read_chunks(path, fmt, self.chunk_size)
+        with ProcessPoolExecutor(self.processes) as parsers, \
+                ThreadPoolExecutor(self.workers) as writers:
+            for index, (line, header, rows) in enumerate(chunks):
+                if index in done_chunks:
+                    result['skipped'] += len(rows)
+                    progress.add(len(rows))
+                    continue
+
+                parsed = parsers.submit(parse_chunk, kind, fmt, line, header,
+                                        rows)
+                in_flight.append((index, parsed, len(rows)))
+                # keep parsing ahead of uploads without reading the whole file
+                if len(in_flight) > self.processes * 2:
+                    upload(*in_flight.popleft(), writers=writers)
+
+            while in_flight:
+                upload(*in_flight.popleft(), writers=writers)
+
+        progress.finish()
+        return result, errors
+
+    def _count_rows(self, path, fmt):
+        with io.open(path, encoding='utf-8', newline='') as f:
+            if fmt == 'csv':
+                return max(sum(1 for _ in csv.reader(f)) - 1, 0)
+            return sum(1 for _ in f)
+
+    def _load_checkpoint(self):
+        if self.checkpoint is None or not os.path.exists(self.checkpoint):
+            return {}
+        with open(self.checkpoint) as f:
+            return json.load(f)
+
+    def _done_chunks(self, key):
+        saved = self._load_checkpoint().get(key)
+        if saved is None:
+            return set()
+        if saved['chunk_size'] != self.chunk_size:
+            raise BaremetricsException(
+                'Checkpoint {} was written with chunk size {}, '
+                'cannot resume with {}'.format(
+                    self.checkpoint, saved['chunk_size'], self.chunk_size))
+        return set(saved['done'])
+
+    def _save_checkpoint(self, key, done_chunks):
+        if self.checkpoint is None:
+            return
+        state = self._load_checkpoint()
+        state[key] = {'chunk_size': self.chunk_size,
+                      'done': sorted(done_chunks)}
+
+        tmp = '{}.tmp'.format(self.checkpoint)
+        with open(tmp, 'w') as f:
+            json.dump(state, f)
+        getattr(os, 'replace', os.rename)(tmp, self.checkpoint)
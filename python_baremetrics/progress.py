@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+
+class Progress(object):
+    """
+    Thread-safe counter of processed rows with throughput and ETA.
+
+    ``callback`` is called with the Progress object at most once
+    per ``interval`` seconds, and once more on ``finish``.
+    """
+
+    def __init__(self, total=None, callback=None, interval=1.0, unit='rows'):
+        self.total = total
+        self.callback = callback
+        self.interval = interval
+        self.unit = unit
+        self.count = 0
+        self.started = time.time()
+
+        self._reported = 0
+        self._lock = threading.Lock()
+
+    @property
+    def elapsed(self):
+        return time.time() - self.started
+
+    @property
+    def rate(self):
+        elapsed = self.elapsed
+        return self.count / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta(self):
+        """
+        :return: seconds left, None when the total or the rate is unknown
+        """
+        rate = self.rate
+        if self.total is None or not rate:
+            return None
+        return max(self.total - self.count, 0) / rate
+
+    def add(self, n=1):
+        with self._lock:
+            self.count += n
+            now = time.time()
+            report = (self.callback is not None and
+                      now - self._reported >= self.interval)
+            if report:
+                self._reported = now
+        if report:
+            self.callback(self)
+
+    def finish(self):
+        if self.callback is not None:
+            self.callback(self)
+
+    def __str__(self):
+        if self.total is None:
+            done = '{} {}'.format(self.count, self.unit)
+        else:
+            done = '{}/{} {}'.format(self.count, self.total, self.unit)
+
+        message = '{}, {:.1f} {}/s'.format(done, self.rate, self.unit)
+        eta = self.eta
+        if eta is not None:
+            message = '{}, ETA {:.0f}s'.format(message, eta)
+        return message
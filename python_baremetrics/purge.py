@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+import collections
+import logging
+
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from .exceptions import BaremetricsException
+from .helpers import paginate
+from .progress import Progress
+
+logger = logging.getLogger('baremetrics')
+
+# objects are deleted before the objects they depend on
+ORDER = ('charge', 'subscription', 'customer', 'plan')
+
+
+class Purger(object):
+    """
+    Deletes every charge, subscription, customer and plan of a source.
+
+    Each kind is listed completely before deleting it, since deleting while
+    paginating would shift the pages. Deletes run concurrently, kind by kind
+    in dependency order. Pass a client with a RateLimiter to stay under
+    the API rate limit.
+    """
+
+    def __init__(self, client, source_id, workers=8, kinds=ORDER,
+                 progress=None):
+        """
+        :param kinds: kinds to delete, always deleted in ORDER
+        :param progress: callable called with a Progress object per kind,
+                         logs deletes/sec by default
+        """
+        unknown = set(kinds) - set(ORDER)
+        if unknown:
+            raise BaremetricsException('Cannot purge {}'.format(
+                ', '.join(sorted(unknown))))
+
+        self.client = client
+        self.source_id = source_id
+        self.workers = workers
+        self.kinds = [kind for kind in ORDER if kind in kinds]
+        self.progress = progress or (
+            lambda p: logger.info('Deleted {}'.format(p)))
+
+    def oids(self, kind):
+        method = getattr(self.client, 'list_{}s'.format(kind))
+        items = paginate(method, '{}s'.format(kind), self.source_id)
+        return [item['oid'] for item in items]
+
+    def count(self):
+        """
+        :return: number of objects of each kind that a purge would delete
+        """
+        return collections.Counter({kind: len(self.oids(kind))
+                                    for kind in self.kinds})
+
+    def run(self, dry_run=False):
+        """
+        :return: (Counter of deleted objects per kind,
+                  list of (kind, oid, exception)), or the counts of a dry run
+        """
+        if dry_run:
+            return self.count()
+
+        deleted = collections.Counter()
+        errors = []
+
+        for kind in self.kinds:
+            oids = self.oids(kind)
+            delete = getattr(self.client, 'delete_{}'.format(kind))
+            progress = Progress(total=len(oids), callback=self.progress,
+                                unit='{}s'.format(kind))
+
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                pending = {}
+                for oid in oids:
+                    # bound the number of queued deletes
+                    if len(pending) >= self.workers * 4:
+                        self._collect(kind, pending, deleted, errors, progress)
+                    pending[executor.submit(delete, self.source_id, oid)] = oid
+                while pending:
+                    self._collect(kind, pending, deleted, errors, progress)
+
+            progress.finish()
+
+        return deleted, errors
+
+    @staticmethod
+    def _collect(kind, pending, deleted, errors, progress):
+        done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+        for future in done:
+            oid = pending.pop(future)
+            try:
+                future.result()
+            except BaremetricsException as e:
+                errors.append((kind, oid, e))
+            else:
+                deleted[kind] += 1
+            progress.add()
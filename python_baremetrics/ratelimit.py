@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+
+class RateLimiter(object):
+    """
+    Token bucket shared by all threads using a client.
+
+    Allows ``rate`` requests per second on average with bursts of up to
+    ``burst`` requests. When the API answers 429 anyway, the client waits
+    for Retry-After (or backs off exponentially) and retries up to
+    ``max_retries`` times, pausing every other thread meanwhile.
+    """
+
+    def __init__(self, rate, burst=None, max_retries=5, max_backoff=60):
+        if rate <= 0:
+            raise ValueError('rate must be positive')
+
+        self.rate = float(rate)
+        self.burst = burst or max(int(rate), 1)
+        self.max_retries = max_retries
+        self.max_backoff = max_backoff
+        self.throttled = 0
+
+        self._tokens = float(self.burst)
+        self._updated = time.time()
+        self._paused_until = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.time()
+                refill = (now - self._updated) * self.rate
+                self._tokens = min(self.burst, self._tokens + refill)
+                self._updated = now
+
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                elif self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                else:
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def backoff(self, retry_after, attempt):
+        """
+        Pauses all requests after a 429 response.
+
+        :param retry_after: value of the Retry-After header, if any
+        :param attempt: number of the retry, starting at 1
+        """
+        try:
+            wait = float(retry_after)
+        except (TypeError, ValueError):
+            wait = 2 ** attempt
+        wait = min(wait, self.max_backoff)
+
+        with self._lock:
+            self.throttled += 1
+            self._paused_until = max(self._paused_until, time.time() + wait)
+        time.sleep(wait)
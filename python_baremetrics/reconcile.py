@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+import collections
+import hashlib
+import json
+import logging
+
+from concurrent.futures import ThreadPoolExecutor
+
+from .exceptions import BaremetricsException, RecreateFailed
+from .helpers import paginate
+from .progress import Progress
+from .state import flatten_oids
+
+logger = logging.getLogger('baremetrics')
+
+# fields compared by default, per kind
+FIELDS = {
+    'customer': ('name', 'email', 'notes', 'created'),
+    'subscription': ('plan_oid', 'customer_oid', 'started_at', 'canceled_at',
+                     'quantity', 'discount'),
+    'charge': ('customer_oid', 'amount', 'currency', 'status', 'created'),
+}
+
+ReconcilePlan = collections.namedtuple('ReconcilePlan',
+                                       ['creates', 'updates', 'deletes'])
+
+
+def record_hash(record, fields):
+    """
+    :return: hash of the given fields of a record, stable across runs
+    """
+    content = json.dumps([record.get(f) for f in fields], sort_keys=True,
+                         default=str)
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+
+def bucket_of(oid, buckets):
+    digest = hashlib.sha1(str(oid).encode('utf-8')).hexdigest()
+    return int(digest[:8], 16) % buckets
+
+
+class HashIndex(object):
+    """
+    Record hashes of one side grouped into buckets, with a digest per bucket.
+    Only oids and hashes are kept, never the records themselves.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self._hashes = collections.defaultdict(dict)
+        self._digests = collections.defaultdict(int)
+
+    def add(self, oid, digest):
+        bucket = bucket_of(oid, self.buckets)
+        self._hashes[bucket][oid] = digest
+        # xor keeps bucket digests independent of listing order
+        entry = '{}:{}'.format(oid, digest).encode('utf-8')
+        self._digests[bucket] ^= int(hashlib.sha1(entry).hexdigest(), 16)
+
+    def digest(self, bucket):
+        return self._digests.get(bucket, 0)
+
+    def hashes(self, bucket):
+        return self._hashes.get(bucket, {})
+
+    def __len__(self):
+        return sum(len(h) for h in self._hashes.values())
+
+
+class Reconciler(object):
+    """
+    Brings one kind of objects of a Baremetrics source in line with
+    an external system of record.
+
+    Both sides are reduced to per-record hashes and per-bucket digests.
+    Only buckets whose digests differ are compared record by record, and only
+    the records that differ are written, in concurrent batches.
+
+    The API offers no server-side digests, so the remote side is still read
+    by listing it, but the listing is streamed and reduced to hashes.
+    """
+
+    def __init__(self, client, source_id, kind, fields=None, buckets=1024,
+                 workers=8, batch_size=100, progress=None):
+        """
+        :param kind: 'customer', 'subscription' or 'charge'
+        :param fields: fields to compare, FIELDS[kind] by default
+        :param progress: callable called with a Progress object while
+                         hashing each side and while writing
+        """
+        if kind not in FIELDS:
+            raise BaremetricsException('Cannot reconcile {}'.format(kind))
+
+        self.client = client
+        self.source_id = source_id
+        self.kind = kind
+        self.fields = tuple(fields or FIELDS[kind])
+        self.buckets = buckets
+        self.workers = workers
+        self.batch_size = batch_size
+        self.progress = progress
+
+    def index(self, records, side='local'):
+        index = HashIndex(self.buckets)
+        progress = Progress(callback=self.progress,
+                            unit='{} {}s'.format(side, self.kind))
+        for record in records:
+            record = flatten_oids(self.kind, record)
+            index.add(record['oid'], record_hash(record, self.fields))
+            progress.add()
+        progress.finish()
+        return index
+
+    def remote_records(self):
+        method = getattr(self.client, 'list_{}s'.format(self.kind))
+        return paginate(method, '{}s'.format(self.kind), self.source_id)
+
+    def diff(self, local):
+        """
+        :param local: callable returning an iterable of local records
+                      (dicts with 'oid')
+        :return: ReconcilePlan with sets of oids to create, update and delete
+        """
+        local_index = self.index(local())
+        remote_index = self.index(self.remote_records(), side='remote')
+
+        plan = ReconcilePlan(set(), set(), set())
+        differing = 0
+        for bucket in range(self.buckets):
+            if local_index.digest(bucket) == remote_index.digest(bucket):
+                continue
+            differing += 1
+
+            ours = local_index.hashes(bucket)
+            theirs = remote_index.hashes(bucket)
+            for oid, digest in ours.items():
+                if oid not in theirs:
+                    plan.creates.add(oid)
+                elif theirs[oid] != digest:
+                    plan.updates.add(oid)
+            plan.deletes.update(oid for oid in theirs if oid not in ours)
+
+        logger.info(
+            'Reconciling {} {}s against {}: {} of {} buckets differ'.format(
+                len(local_index), self.kind, len(remote_index), differing,
+                self.buckets))
+        return plan
+
+    def apply(self, plan, local):
+        """
+        Issues the create/update/delete calls of a plan.
+
+        :param local: same callable as passed to diff, read again for the
+                      records to write
+        Charges can't be updated in place, they are deleted and created
+        again. If the create fails the charge is missing from Baremetrics,
+        and the error is reported as a 'recreate' operation rather than an
+        'update'.
+
+        :return: (Counter of done operations,
+                  list of (operation, oid, exception))
+        """
+        done = collections.Counter()
+        errors = []
+        total = len(plan.creates) + len(plan.updates) + len(plan.deletes)
+        progress = Progress(total=total, callback=self.progress, unit='writes')
+
+        def run(operations):
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                for start in range(0, len(operations), self.batch_size):
+                    batch = operations[start:start + self.batch_size]
+                    futures = [(op, oid, executor.submit(fn, *args))
+                               for op, oid, fn, args in batch]
+                    for op, oid, future in futures:
+                        try:
+                            future.result()
+                        except RecreateFailed as e:
+                            errors.append(('recreate', oid, e))
+                        except BaremetricsException as e:
+                            errors.append((op, oid, e))
+                        else:
+                            done[op] += 1
+                        progress.add()
+
+        run([('delete', oid, self._delete, (oid,))
+             for oid in sorted(plan.deletes)])
+
+        writes = []
+        for record in local():
+            oid = record.get('oid')
+            if oid in plan.creates:
+                writes.append(('create', oid, self._create, (record,)))
+            elif oid in plan.updates:
+                writes.append(('update', oid, self._update, (record,)))
+        run(writes)
+
+        progress.finish()
+        return done, errors
+
+    def run(self, local, dry_run=False):
+        plan = self.diff(local)
+        if dry_run:
+            return plan
+        return self.apply(plan, local)
+
+    def _payload(self, record):
+        record = flatten_oids(self.kind, record)
+        return {f: record[f] for f in self.fields if record.get(f) is not None}
+
+    def _create(self, record):
+        create = getattr(self.client, 'create_{}'.format(self.kind))
+        return create(self.source_id, oid=record['oid'],
+                      **self._payload(record))
+
+    def _update(self, record):
+        data = self._payload(record)
+        if self.kind == 'customer':
+            return self.client.update_customer(self.source_id, record['oid'],
+                                               **data)
+        if self.kind == 'subscription':
+            plan_oid = data.pop('plan_oid', None)
+            if plan_oid is None:
+                raise BaremetricsException(
+                    'Subscription {} has no plan_oid, not updating it'.format(
+                        record['oid']))
+            return self.client.update_subscription(
+                self.source_id, record['oid'], plan_oid, **data)
+
+        # charges can't be updated in place
+        self._delete(record['oid'])
+        try:
+            return self._create(record)
+        except BaremetricsException as e:
+            logger.error('Charge {} was deleted and could not be created '
+                         'again: {}'.format(record['oid'], e))
+            raise RecreateFailed(
+                'Deleted charge {} but could not create it again: {}'.format(
+                    record['oid'], e))
+
+    def _delete(self, oid):
+        delete = getattr(self.client, 'delete_{}'.format(self.kind))
+        return delete(self.source_id, oid)
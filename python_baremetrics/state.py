@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+import collections
+import threading
+
+
+# nested objects returned by the API and the write parameter they map to
+NESTED_OIDS = {
+    'subscription': {'plan': 'plan_oid', 'customer': 'customer_oid'},
+    'charge': {'customer': 'customer_oid'},
+}
+
+
+def flatten_oids(kind, fields):
+    """
+    Copies oids of nested objects (e.g. a subscription's plan) into the
+    parameter names used on write (plan_oid).
+    """
+    fields = dict(fields)
+    for nested, param in NESTED_OIDS.get(kind, {}).items():
+        if isinstance(fields.get(nested), dict):
+            fields[param] = fields[nested].get('oid')
+    return fields
+
+
+class StateTracker(object):
+    """
+    Last known state of customers, subscriptions and plans.
+
+    Filled from reads and successful writes, and used by the client to send
+    only changed fields on update and to skip updates that change nothing.
+    """
+
+    def __init__(self):
+        self._state = {}
+        self._lock = threading.Lock()
+        self.saved = collections.Counter()
+
+    def get(self, kind, source_id, oid):
+        with self._lock:
+            known = self._state.get((kind, source_id, oid))
+            return dict(known) if known is not None else None
+
+    def remember(self, kind, source_id, fields):
+        """
+        :param kind: 'customer', 'subscription' or 'plan'
+        :param fields: object as returned by the API or sent to it,
+                       must contain 'oid'
+        """
+        oid = fields.get('oid')
+        if oid is None:
+            return
+
+        fields = flatten_oids(kind, fields)
+        with self._lock:
+            self._state.setdefault((kind, source_id, oid), {}).update(fields)
+
+    def remember_response(self, kind, source_id, response):
+        """
+        Remembers objects from a show_* or list_* response.
+        """
+        if not isinstance(response, dict):
+            return
+        if isinstance(response.get(kind), dict):
+            self.remember(kind, source_id, response[kind])
+        for item in response.get('{}s'.format(kind)) or []:
+            self.remember(kind, source_id, item)
+
+    def forget(self, kind, source_id, oid):
+        with self._lock:
+            self._state.pop((kind, source_id, oid), None)
+
+    def diff(self, kind, source_id, oid, fields):
+        """
+        :return: fields that differ from the last known state,
+                 all of them when the object is unknown
+        """
+        known = self.get(kind, source_id, oid)
+        if known is None:
+            return dict(fields)
+        return {k: v for k, v in fields.items()
+                if k not in known or known[k] != v}
+
+    def skip(self, kind):
+        with self._lock:
+            self.saved[kind] += 1
+
+    @property
+    def round_trips_saved(self):
+        return sum(self.saved.values())
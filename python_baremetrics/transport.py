@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+import requests
+from requests.adapters import HTTPAdapter
+
+from .exceptions import BaremetricsException
+
+
+class Transport(object):
+    """
+    Sends HTTP requests for BaremetricsClient.
+
+    ``request`` returns a response object with ``status_code``, ``json()``,
+    ``text`` and ``request.method``/``request.url``, as both requests and
+    httpx responses do.
+    """
+
+    def request(self, method, url, headers=None, params=None, data=None):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class RequestsTransport(Transport):
+    """
+    HTTP/1.1 through a requests Session, reusing up to ``pool_size``
+    keep-alive connections.
+    """
+
+    def __init__(self, pool_size=10, timeout=None):
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size,
+                              pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def request(self, method, url, headers=None, params=None, data=None):
+        return self.session.request(method, url, headers=headers,
+                                    params=params, data=data,
+                                    timeout=self.timeout)
+
+    def close(self):
+        self.session.close()
+
+
+class HTTP2Transport(Transport):
+    """
+    HTTP/2 through httpx, multiplexing concurrent requests over
+    at most ``max_connections`` connections. Requires httpx[http2].
+    """
+
+    def __init__(self, max_connections=4, timeout=30.0):
+        try:
+            import httpx
+        except ImportError:
+            raise BaremetricsException(
+                'HTTP/2 transport requires httpx[http2]')
+
+        self.client = httpx.Client(
+            http2=True,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections),
+        )
+
+    def request(self, method, url, headers=None, params=None, data=None):
+        if isinstance(data, bytes):
+            return self.client.request(method, url, headers=headers,
+                                       params=params or None, content=data)
+        return self.client.request(method, url, headers=headers,
+                                   params=params or None, data=data)
+
+    def close(self):
+        self.client.close()
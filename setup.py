@@ -13,6 +13,7 @@ with open('HISTORY.rst') as history_file:
 
 requirements = [
     'requests',
+    'futures; python_version < "3"',
 ]
 
 setup_requirements = [
@@ -32,8 +33,19 @@ setup(
     author_email='smirnoffmg@gmail.com',
     url='https://github.com/budurli/python-baremetrics',
     packages=find_packages(include=['python_baremetrics']),
+    entry_points={
+        'console_scripts': [
+            'baremetrics=python_baremetrics.cli:main',
+        ],
+    },
     include_package_data=True,
     install_requires=requirements,
+    extras_require={
+        'brotli': ['brotli'],
+        'currency': ['numpy'],
+        'http2': ['httpx[http2]'],
+        'parquet': ['pyarrow'],
+    },
     license="Apache Software License 2.0",
     zip_safe=False,
     keywords='baremetrics',
@@ -1,3 +1,22 @@
 # -*- coding: utf-8 -*-
 
 """Unit test package for python_baremetrics."""
+
+import io
+import json
+
+import requests
+
+TEST_TOKEN = 'sk_u8fHvBAO4ubaMrlMSQfNlg'
+
+
+def response(payload, status_code=200, headers=None):
+    """
+    :return: requests Response with a JSON body, for mocked transports
+    """
+    r = requests.Response()
+    r.status_code = status_code
+    r.headers.update(headers or {})
+    r._content = json.dumps(payload).encode('utf-8')
+    r.raw = io.BytesIO()
+    return r
@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for staleness-bounded reads."""
+
+import time
+import unittest
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from python_baremetrics import BaremetricsClient, ReadCache
+
+from tests import TEST_TOKEN, response
+
+
+class TestReadCache(unittest.TestCase):
+
+    def setUp(self):
+        self.transport = mock.Mock()
+        self.transport.request.side_effect = lambda *args, **kwargs: response({'customer': {'oid': 'cus_1'}})
+        self.cache = ReadCache()
+        self.test_client = BaremetricsClient(token=TEST_TOKEN, transport=self.transport, cache=self.cache)
+
+    def tearDown(self):
+        del self.test_client
+
+    def test_fresh_reads_are_local(self):
+        self.test_client.show_customer('src', 'cus_1', max_staleness=60)
+        self.test_client.show_customer('src', 'cus_1', max_staleness=60)
+
+        self.assertEqual(self.transport.request.call_count, 1)
+        self.assertEqual(self.test_client.read_stats.by_endpoint(),
+                         {'GET {id}/customers/{id}': {'local': 1, 'remote': 1}})
+
+    def test_stale_reads_are_remote(self):
+        self.test_client.show_customer('src', 'cus_1')
+        self.cache.set('src/customers/cus_1', {'customer': {}}, stored_at=time.time() - 120)
+
+        self.assertEqual(self.test_client.show_customer('src', 'cus_1', max_staleness=60),
+                         {'customer': {'oid': 'cus_1'}})
+        self.assertEqual(self.transport.request.call_count, 2)
+
+    def test_remote_reads_are_counted_without_cache(self):
+        test_client = BaremetricsClient(token=TEST_TOKEN, transport=self.transport)
+        test_client.show_customer('src', 'cus_1', max_staleness=60)
+
+        self.assertEqual(test_client.read_stats.by_endpoint(), {'GET {id}/customers/{id}': {'remote': 1}})
+
+    def test_writes_invalidate_collection(self):
+        self.test_client.show_customer('src', 'cus_1', max_staleness=60)
+        self.test_client.update_customer('src', 'cus_1', name='New')
+        self.test_client.show_customer('src', 'cus_1', max_staleness=60)
+
+        self.assertEqual(self.transport.request.call_count, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
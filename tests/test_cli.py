@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `python_baremetrics.cli` module."""
+
+import collections
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from python_baremetrics import cli
+from python_baremetrics.reconcile import ReconcilePlan
+
+from tests import TEST_TOKEN
+
+
+class TestCli(unittest.TestCase):
+
+    def main(self, *argv):
+        return cli.main(['--token', TEST_TOKEN] + list(argv))
+
+    def test_parser(self):
+        args = cli.build_parser().parse_args(
+            ['--token', TEST_TOKEN, '--workers', '4', '--rate-limit', '2.5', 'purge', 'src', '--kinds', 'plan,charge'])
+        self.assertEqual(args.workers, 4)
+        self.assertEqual(args.rate_limit, 2.5)
+        self.assertEqual(args.kinds, ['plan', 'charge'])
+        self.assertIs(args.run, cli.run_purge)
+
+    def test_unknown_kinds_are_rejected(self):
+        with mock.patch('sys.stderr'):
+            self.assertRaises(SystemExit, self.main, 'export', 'src', '--kinds', 'customers,goals')
+
+    @mock.patch('python_baremetrics.cli.export', return_value=3)
+    def test_export(self, export):
+        with mock.patch('sys.stdout'):
+            self.assertEqual(self.main('export', 'src', '--kinds', 'customers,plans', '--output-dir', 'out',
+                                       '--format', 'csv', '--compression', 'gzip'), 0)
+
+        paths = sorted(c[0][3] for c in export.call_args_list)
+        self.assertEqual(paths, [os.path.join('out', 'customers.csv.gz'), os.path.join('out', 'plans.csv.gz')])
+        self.assertIsInstance(export.call_args[1]['progress'], cli.Reporter)
+
+    @mock.patch('python_baremetrics.cli.export', return_value=3)
+    def test_parquet_export_has_no_gz_suffix(self, export):
+        with mock.patch('sys.stdout'):
+            self.main('export', 'src', '--kinds', 'charges', '--format', 'parquet', '--compression', 'gzip')
+        self.assertEqual(export.call_args[0][3], os.path.join('.', 'charges.parquet'))
+        self.assertEqual(export.call_args[1]['compression'], 'gzip')
+
+    @mock.patch('python_baremetrics.cli.Importer')
+    def test_import(self, importer):
+        importer.return_value.run.return_value = (collections.Counter(imported=2), [])
+        with mock.patch('sys.stdout'):
+            self.assertEqual(self.main('--workers', '3', 'import', 'src', 'customer', 'customers.csv',
+                                       '--checkpoint', 'cp.json', '--chunk-size', '10'), 0)
+
+        kwargs = importer.call_args[1]
+        self.assertEqual((kwargs['checkpoint'], kwargs['chunk_size'], kwargs['workers']), ('cp.json', 10, 3))
+        importer.return_value.run.assert_called_once_with('customers.csv', 'customer')
+
+    @mock.patch('python_baremetrics.cli.Reconciler')
+    def test_sync_dry_run(self, reconciler):
+        reconciler.return_value.diff.return_value = ReconcilePlan({'cus_1'}, set(), set())
+        with mock.patch('sys.stdout'):
+            self.assertEqual(self.main('sync', 'src', 'customer', 'customers.ndjson', '--dry-run'), 0)
+
+        self.assertIsInstance(reconciler.call_args[1]['progress'], cli.Reporter)
+        self.assertFalse(reconciler.return_value.apply.called)
+
+    def test_sync_aborts_on_invalid_rows(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'customers.ndjson')
+        with open(path, 'w') as f:
+            f.write(json.dumps({'oid': 'cus_1', 'name': 'One'}) + '\n')
+            f.write(json.dumps({'oid': 'cus_2', 'created': '2020-01-01'}) + '\n')
+
+        client = mock.Mock()
+        client.list_customers.return_value = {
+            'customers': [{'oid': 'cus_1', 'name': 'One'}, {'oid': 'cus_2'}],
+            'meta': {'pagination': {'has_more': False}},
+        }
+        with mock.patch('python_baremetrics.cli.make_client', return_value=(client, lambda p: None)), \
+                mock.patch('sys.stdout'), mock.patch('sys.stderr') as stderr:
+            self.assertEqual(self.main('sync', 'src', 'customer', path), 1)
+
+        self.assertFalse(client.delete_customer.called)
+        self.assertIn('line 2: created is not an integer', [c[0][0] for c in stderr.write.call_args_list])
+
+    @mock.patch('python_baremetrics.cli.Purger')
+    def test_purge_requires_yes(self, purger):
+        purger.return_value.kinds = ['plan']
+        purger.return_value.run.return_value = collections.Counter(plan=2)
+        with mock.patch('sys.stdout'), mock.patch('sys.stderr'):
+            self.assertEqual(self.main('purge', 'src'), 1)
+        purger.return_value.run.assert_called_once_with(dry_run=True)
+
+    @mock.patch('python_baremetrics.cli.Purger')
+    def test_purge(self, purger):
+        purger.return_value.kinds = ['plan']
+        purger.return_value.run.return_value = (collections.Counter(plan=2), [])
+        with mock.patch('sys.stdout'):
+            self.assertEqual(self.main('purge', 'src', '--yes'), 0)
+        purger.return_value.run.assert_called_once_with()
+
+
+if __name__ == '__main__':
+    unittest.main()
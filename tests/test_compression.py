@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `python_baremetrics.compression` module."""
+
+import gzip
+import unittest
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from python_baremetrics import BaremetricsClient
+from python_baremetrics.compression import endpoint_of
+
+from tests import TEST_TOKEN, response
+
+
+class TestCompression(unittest.TestCase):
+
+    def setUp(self):
+        self.transport = mock.Mock()
+        self.transport.request.return_value = response({'customer': {}})
+        self.test_client = BaremetricsClient(token=TEST_TOKEN, transport=self.transport, compress_requests=100)
+
+    def tearDown(self):
+        del self.test_client
+
+    def test_endpoint_of(self):
+        self.assertEqual(endpoint_of('GET', 'src_1/customers/cus_1?page=2'), 'GET {id}/customers/{id}')
+        self.assertEqual(endpoint_of('PUT', 'src_1/subscriptions/sub_1/cancel'), 'PUT {id}/subscriptions/{id}/cancel')
+
+    def test_large_bodies_are_compressed(self):
+        self.test_client.create_customer('src', oid='cus_1', notes='x' * 1000)
+
+        kwargs = self.transport.request.call_args[1]
+        self.assertEqual(kwargs['headers']['Content-Encoding'], 'gzip')
+        self.assertIn(b'oid=cus_1', gzip.decompress(kwargs['data']))
+
+        stats = self.test_client.transfer_stats.by_endpoint()['POST {id}/customers']
+        self.assertEqual(stats['requests'], 1)
+        self.assertLess(stats['sent'], stats['sent_uncompressed'])
+        self.assertEqual(stats['received_uncompressed'], 16)
+
+    def test_small_bodies_are_not_compressed(self):
+        self.test_client.create_customer('src', oid='cus_1')
+
+        kwargs = self.transport.request.call_args[1]
+        self.assertNotIn('Content-Encoding', kwargs['headers'])
+        self.assertEqual(kwargs['data'], {'oid': 'cus_1'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `python_baremetrics.currency` module."""
+
+import unittest
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from python_baremetrics.currency import CurrencyNormalizer
+
+ACCOUNT = {'account': {'default_currency': {'id': 'usd', 'iso_code': 'USD', 'subunit_to_unit': 100}}}
+
+
+class TestCurrencyNormalizer(unittest.TestCase):
+
+    def setUp(self):
+        self.test_client = mock.Mock()
+        self.test_client.get_account.return_value = ACCOUNT
+        self.normalizer = CurrencyNormalizer(self.test_client, rates={'EUR': 1.1, 'jpy': 0.0067})
+
+    def test_normalize(self):
+        result = self.normalizer.normalize([1000, 1000, 1000], ['USD', 'eur', 'JPY'])
+        self.assertEqual([round(x, 2) for x in result], [1000, 1100, 670])
+        self.test_client.get_account.assert_called_once_with()
+
+    def test_normalize_plans(self):
+        plans = [
+            {'amounts': [{'currency': 'EUR', 'amount': 100}, {'currency': 'USD', 'amount': 120}]},
+            {'amounts': [{'currency': 'EUR', 'amount': 100}]},
+        ]
+        self.assertEqual([round(x, 2) for x in self.normalizer.normalize_plans(plans)], [120, 110])
+
+    def test_default_currency_subunits_come_from_the_account(self):
+        self.test_client.get_account.return_value = {
+            'account': {'default_currency': {'id': 'mga', 'iso_code': 'MGA', 'subunit_to_unit': 5}}}
+        normalizer = CurrencyNormalizer(self.test_client, rates={'EUR': 2, 'ABC': 1})
+
+        self.assertEqual(list(normalizer.normalize([100, 100], ['MGA', 'EUR'])), [100, 10])
+        # subunit_to_unit of API currency objects wins over the table
+        charges = [{'amount': 1000, 'currency': {'id': 'abc', 'iso_code': 'ABC', 'subunit_to_unit': 1000}}]
+        self.assertEqual(list(normalizer.normalize_charges(charges)), [5])
+
+    def test_total(self):
+        self.assertAlmostEqual(self.normalizer.total([100, 200], ['USD', 'EUR']), 320)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `python_baremetrics.export` module."""
+
+import csv
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+try:
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+from python_baremetrics import BaremetricsException
+from python_baremetrics.export import export
+
+CHARGES = [
+    {'oid': 'ch_{}'.format(i), 'amount': 100 * i, 'customer': {'oid': 'cus_1'}, 'refunded_at': None}
+    for i in range(5)
+]
+
+
+def list_charges(source_id, page=0, per_page=100):
+    return {
+        'charges': CHARGES[page * per_page:(page + 1) * per_page],
+        'meta': {'pagination': {'has_more': (page + 1) * per_page < len(CHARGES)}},
+    }
+
+
+class TestExport(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.test_client = mock.Mock()
+        self.test_client.list_charges.side_effect = list_charges
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def export(self, name, records=None, **kwargs):
+        if records is not None:
+            self.test_client.list_charges.side_effect = lambda source_id, page=0, per_page=100: {
+                'charges': records[page * per_page:(page + 1) * per_page],
+                'meta': {'pagination': {'has_more': (page + 1) * per_page < len(records)}},
+            }
+        path = os.path.join(self.directory, name)
+        count = export(self.test_client, 'src', 'charges', path, per_page=2, **kwargs)
+        return path, count
+
+    def test_ndjson(self):
+        path, count = self.export('charges.ndjson')
+        with io.open(path, encoding='utf-8') as f:
+            self.assertEqual([json.loads(line) for line in f], CHARGES)
+        self.assertEqual(count, 5)
+        self.assertEqual(self.test_client.list_charges.call_count, 3)
+
+    def test_ndjson_gzip(self):
+        path, _ = self.export('charges.ndjson.gz')
+        with gzip.open(path, 'rt') as f:
+            self.assertEqual([json.loads(line) for line in f], CHARGES)
+
+    def test_csv(self):
+        path, _ = self.export('charges.csv')
+        with io.open(path, encoding='utf-8', newline='') as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual([r['oid'] for r in rows], [c['oid'] for c in CHARGES])
+        self.assertEqual(rows[1]['amount'], '100')
+        self.assertEqual(json.loads(rows[0]['customer']), {'oid': 'cus_1'})
+
+    @unittest.skipIf(pyarrow is None, 'requires pyarrow')
+    def test_parquet(self):
+        records = [dict(c) for c in CHARGES]
+        records[4]['refunded_at'] = 1500000000
+        path, _ = self.export('charges.parquet', records, row_group_size=2)
+
+        parquet = pyarrow.parquet.ParquetFile(path)
+        self.assertEqual(parquet.metadata.num_row_groups, 3)
+        self.assertEqual(parquet.metadata.row_group(0).column(0).compression, 'SNAPPY')
+        table = parquet.read()
+        self.assertEqual(table.column('refunded_at').to_pylist(), [None] * 4 + ['1500000000'])
+        self.assertEqual(table.column('amount').to_pylist(), [0, 100, 200, 300, 400])
+
+    @unittest.skipIf(pyarrow is None, 'requires pyarrow')
+    def test_parquet_new_fields_fail(self):
+        records = [dict(c) for c in CHARGES]
+        records[4]['status'] = 'paid'
+        self.assertRaises(BaremetricsException, self.export, 'charges.parquet', records, row_group_size=2)
+        table = pyarrow.parquet.read_table(os.path.join(self.directory, 'charges.parquet'))
+        self.assertEqual(table.num_rows, 4)
+
+    @unittest.skipIf(pyarrow is None, 'requires pyarrow')
+    def test_parquet_conversion_error_keeps_file_readable(self):
+        records = [dict(c) for c in CHARGES]
+        records[2]['amount'] = 'x'
+
+        with self.assertRaises(BaremetricsException) as context:
+            self.export('charges.parquet', records, row_group_size=2)
+        self.assertIn('column amount', str(context.exception))
+
+        table = pyarrow.parquet.read_table(os.path.join(self.directory, 'charges.parquet'))
+        self.assertEqual(table.column('oid').to_pylist(), ['ch_0', 'ch_1'])
+
+
+if __name__ == '__main__':
+    unittest.main()
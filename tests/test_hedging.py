@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `python_baremetrics.hedging` module."""
+
+import time
+import unittest
+
+from python_baremetrics import HedgingPolicy
+
+
+class TestHedgingPolicy(unittest.TestCase):
+
+    def setUp(self):
+        self.policy = HedgingPolicy(percentile=50, budget=1, min_samples=3, min_delay=0)
+
+    def tearDown(self):
+        self.policy.shutdown()
+
+    def test_no_hedging_without_samples(self):
+        self.assertIsNone(self.policy.delay())
+        self.assertEqual(self.policy.run(lambda: 'ok'), 'ok')
+        self.assertEqual(self.policy.hedges, 0)
+
+    def test_hedge_wins_over_slow_primary(self):
+        for _ in range(3):
+            self.policy.run(lambda: 'warmup')
+
+        delays = [0.5, 0]
+
+        def call():
+            time.sleep(delays.pop(0))
+            return 'done'
+
+        self.assertEqual(self.policy.run(call), 'done')
+        self.assertEqual(self.policy.hedges, 1)
+        self.assertEqual(self.policy.hedge_wins, 1)
+
+    def test_queueing_does_not_trigger_hedges(self):
+        policy = HedgingPolicy(percentile=50, budget=1, min_samples=1, min_delay=0.05, max_workers=1)
+        policy.run(lambda: 'warmup')
+
+        blocker = policy._executor.submit(time.sleep, 0.2)
+        self.assertEqual(policy.run(lambda: 'done'), 'done')
+        blocker.result()
+
+        self.assertEqual(policy.hedges, 0)
+        policy.shutdown()
+
+    def test_budget_limits_hedges(self):
+        policy = HedgingPolicy(percentile=50, budget=0, min_samples=1, min_delay=0)
+        policy.run(lambda: 'warmup')
+        policy.run(lambda: time.sleep(0.05))
+        self.assertEqual(policy.hedges, 0)
+        policy.shutdown()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `python_baremetrics.importer` module."""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from python_baremetrics import BaremetricsException
+from python_baremetrics.importer import Importer, parse_chunk
+
+
+class TestParseChunk(unittest.TestCase):
+
+    def test_csv(self):
+        records, errors = parse_chunk(
+            'charge', 'csv', 2, ['oid', 'customer_oid', 'amount', 'currency'],
+            [['ch_1', 'cus_1', '1500', 'USD'], ['ch_2', '', '10', 'USD']])
+        self.assertEqual(records, [(2, {'oid': 'ch_1', 'customer_oid': 'cus_1', 'amount': 1500, 'currency': 'USD'})])
+        self.assertEqual(errors, [(3, 'missing customer_oid')])
+
+    def test_ndjson(self):
+        records, errors = parse_chunk('customer', 'ndjson', 1, None, ['{"oid": "cus_1"}\n', '\n', '{"name": "x"}\n'])
+        self.assertEqual(records, [(1, {'oid': 'cus_1'})])
+        self.assertEqual(errors, [(3, 'missing oid')])
+
+    def test_malformed_rows_are_invalid(self):
+        rows = ['[1, 2]\n', '{"oid": "cus_1", "created": {"a": 1}}\n', '{"oid": "cus_2", "created": "x"}\n']
+        records, errors = parse_chunk('customer', 'ndjson', 1, None, rows)
+        self.assertEqual(records, [])
+        self.assertEqual(errors, [
+            (1, 'not an object'),
+            (2, 'created is not an integer'),
+            (3, 'created is not an integer'),
+        ])
+
+
+class TestImporter(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'customers.ndjson')
+        self.checkpoint = os.path.join(self.directory, 'checkpoint.json')
+        with open(self.path, 'w') as f:
+            for i in range(5):
+                f.write(json.dumps({'oid': 'cus_{}'.format(i)}) + '\n')
+            f.write('{"name": "no oid"}\n')
+            f.write('\n')
+
+        self.test_client = mock.Mock()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def importer(self, chunk_size=2):
+        return Importer(self.test_client, 'src', checkpoint=self.checkpoint, chunk_size=chunk_size,
+                        processes=1, workers=2, progress=lambda p: None)
+
+    def created(self):
+        return sorted(c[1]['oid'] for c in self.test_client.create_customer.call_args_list)
+
+    def test_run(self):
+        result, errors = self.importer().run(self.path, 'customer')
+
+        self.assertEqual(result, {'imported': 5, 'invalid': 1, 'skipped': 1})
+        self.assertEqual(errors, [(6, 'missing oid')])
+        self.assertEqual(self.created(), ['cus_0', 'cus_1', 'cus_2', 'cus_3', 'cus_4'])
+
+    def test_progress_counts_blank_lines(self):
+        reports = []
+        importer = self.importer()
+        importer.progress = reports.append
+        importer.run(self.path, 'customer')
+
+        self.assertEqual(reports[-1].total, 7)
+        self.assertEqual(reports[-1].count, 7)
+
+    def test_resume_skips_done_chunks(self):
+        self.importer().run(self.path, 'customer')
+        with open(self.checkpoint) as f:
+            state = json.load(f)
+        key = 'customer:{}'.format(os.path.abspath(self.path))
+        self.assertEqual(state[key], {'chunk_size': 2, 'done': [0, 1, 2, 3]})
+
+        # pretend the last two chunks never finished
+        state[key]['done'] = [0]
+        with open(self.checkpoint, 'w') as f:
+            json.dump(state, f)
+        self.test_client.reset_mock()
+
+        result, _ = self.importer().run(self.path, 'customer')
+        self.assertEqual(result, {'skipped': 3, 'imported': 3, 'invalid': 1})
+        self.assertEqual(self.created(), ['cus_2', 'cus_3', 'cus_4'])
+
+    def test_chunks_with_failed_rows_are_retried(self):
+        def create_customer(source_id, oid):
+            if oid == 'cus_3':
+                raise IOError('connection reset')
+        self.test_client.create_customer.side_effect = create_customer
+
+        result, errors = self.importer().run(self.path, 'customer')
+        self.assertEqual(result, {'imported': 4, 'failed': 1, 'invalid': 1, 'skipped': 1})
+        self.assertEqual(errors[0], (4, 'connection reset'))
+
+        self.test_client.create_customer.side_effect = None
+        self.test_client.reset_mock()
+        result, _ = self.importer().run(self.path, 'customer')
+        self.assertEqual(self.created(), ['cus_2', 'cus_3'])
+
+    def test_resume_with_other_chunk_size_fails(self):
+        self.importer().run(self.path, 'customer')
+        self.assertRaises(BaremetricsException, self.importer(chunk_size=5).run, self.path, 'customer')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `python_baremetrics.purge` and `python_baremetrics.ratelimit` modules."""
+
+import threading
+import time
+import unittest
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from python_baremetrics import BaremetricsClient, HedgingPolicy, RateLimiter
+from python_baremetrics.purge import Purger
+
+from tests import TEST_TOKEN, response
+
+
+class TestPurger(unittest.TestCase):
+
+    def setUp(self):
+        self.test_client = mock.Mock()
+        self.deleted = []
+        for kind in ('charge', 'subscription', 'customer', 'plan'):
+            collection = '{}s'.format(kind)
+            getattr(self.test_client, 'list_{}'.format(collection)).return_value = {
+                collection: [{'oid': '{}_{}'.format(kind, i)} for i in range(3)]}
+            getattr(self.test_client, 'delete_{}'.format(kind)).side_effect = \
+                lambda source_id, oid, kind=kind: self.deleted.append(kind)
+
+    def test_dry_run_counts(self):
+        counts = Purger(self.test_client, 'src').run(dry_run=True)
+        self.assertEqual(counts, {'charge': 3, 'subscription': 3, 'customer': 3, 'plan': 3})
+        self.assertEqual(self.deleted, [])
+
+    def test_deletes_in_dependency_order(self):
+        deleted, errors = Purger(self.test_client, 'src', workers=4, progress=lambda p: None).run()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(deleted, {'charge': 3, 'subscription': 3, 'customer': 3, 'plan': 3})
+        self.assertEqual(self.deleted, ['charge'] * 3 + ['subscription'] * 3 + ['customer'] * 3 + ['plan'] * 3)
+
+
+class TestRateLimiter(unittest.TestCase):
+
+    @mock.patch('python_baremetrics.ratelimit.time.sleep')
+    def test_backoff_uses_retry_after(self, sleep):
+        limiter = RateLimiter(10)
+        limiter.backoff('3', 1)
+        sleep.assert_called_once_with(3.0)
+        self.assertEqual(limiter.throttled, 1)
+
+    @mock.patch('python_baremetrics.ratelimit.time.sleep')
+    def test_backoff_is_exponential_without_retry_after(self, sleep):
+        limiter = RateLimiter(10, max_backoff=5)
+        limiter.backoff(None, 2)
+        limiter.backoff(None, 3)
+        self.assertEqual([c[0][0] for c in sleep.call_args_list], [4, 5])
+
+    def test_retries_429(self):
+        transport = mock.Mock()
+        transport.request.side_effect = [
+            response({'error': 'Too many requests'}, status_code=429, headers={'Retry-After': '0'}),
+            response({'sources': []}),
+        ]
+        test_client = BaremetricsClient(token=TEST_TOKEN, transport=transport, rate_limiter=RateLimiter(100))
+
+        self.assertEqual(test_client.list_sources(), {'sources': []})
+        self.assertEqual(transport.request.call_count, 2)
+        self.assertEqual(test_client.rate_limiter.throttled, 1)
+
+    def test_hedges_take_tokens(self):
+        limiter = RateLimiter(1000)
+        limiter.acquire = mock.Mock()
+        hedging = HedgingPolicy(percentile=50, budget=1, min_samples=1, min_delay=0)
+        delays = [0, 0.5, 0]
+        lock = threading.Lock()
+
+        def request(*args, **kwargs):
+            with lock:
+                delay = delays.pop(0)
+            time.sleep(delay)
+            return response({'sources': []})
+
+        transport = mock.Mock()
+        transport.request.side_effect = request
+        test_client = BaremetricsClient(token=TEST_TOKEN, transport=transport, rate_limiter=limiter, hedging=hedging)
+
+        test_client.list_sources()
+        test_client.list_sources()
+
+        self.assertEqual(hedging.hedges, 1)
+        self.assertEqual(limiter.acquire.call_count, 3)
+        hedging.shutdown()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `python_baremetrics.reconcile` module."""
+
+import unittest
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from python_baremetrics.exceptions import BaremetricsException
+from python_baremetrics.reconcile import ReconcilePlan, Reconciler
+
+REMOTE = [
+    {'oid': 'cus_1', 'name': 'Same', 'email': 'same@example.com'},
+    {'oid': 'cus_2', 'name': 'Old', 'email': 'changed@example.com'},
+    {'oid': 'cus_3', 'name': 'Gone', 'email': 'gone@example.com'},
+]
+
+LOCAL = [
+    {'oid': 'cus_1', 'name': 'Same', 'email': 'same@example.com'},
+    {'oid': 'cus_2', 'name': 'New', 'email': 'changed@example.com'},
+    {'oid': 'cus_4', 'name': 'Added', 'email': 'added@example.com'},
+]
+
+
+def list_customers(source_id, page=0, per_page=100):
+    return {
+        'customers': REMOTE[page * 2:page * 2 + 2],
+        'meta': {'pagination': {'has_more': page * 2 + 2 < len(REMOTE)}},
+    }
+
+
+class TestReconciler(unittest.TestCase):
+
+    def setUp(self):
+        self.test_client = mock.Mock()
+        self.test_client.list_customers.side_effect = list_customers
+        self.reconciler = Reconciler(self.test_client, 'src', 'customer', fields=('name', 'email'), buckets=4)
+
+    def test_diff(self):
+        plan = self.reconciler.diff(lambda: LOCAL)
+        self.assertEqual(plan.creates, {'cus_4'})
+        self.assertEqual(plan.updates, {'cus_2'})
+        self.assertEqual(plan.deletes, {'cus_3'})
+
+    def test_apply(self):
+        done, errors = self.reconciler.run(lambda: LOCAL)
+        self.assertEqual(errors, [])
+        self.assertEqual(done, {'create': 1, 'update': 1, 'delete': 1})
+        self.test_client.update_customer.assert_called_once_with(
+            'src', 'cus_2', name='New', email='changed@example.com')
+        self.test_client.delete_customer.assert_called_once_with('src', 'cus_3')
+
+    def test_failed_recreate_is_reported(self):
+        reconciler = Reconciler(self.test_client, 'src', 'charge', fields=('amount',))
+        self.test_client.create_charge.side_effect = BaremetricsException('boom')
+
+        plan = ReconcilePlan(set(), {'ch_1'}, set())
+        done, errors = reconciler.apply(plan, lambda: [{'oid': 'ch_1', 'amount': 100}])
+
+        self.test_client.delete_charge.assert_called_once_with('src', 'ch_1')
+        self.assertEqual([(op, oid) for op, oid, _ in errors], [('recreate', 'ch_1')])
+        self.assertEqual(done, {})
+
+    def test_subscription_without_plan_is_not_updated(self):
+        reconciler = Reconciler(self.test_client, 'src', 'subscription', fields=('plan_oid', 'quantity'))
+        plan = ReconcilePlan(set(), {'sub_1'}, set())
+
+        done, errors = reconciler.apply(plan, lambda: [{'oid': 'sub_1', 'quantity': 2}])
+
+        self.assertFalse(self.test_client.update_subscription.called)
+        self.assertEqual([(op, oid) for op, oid, _ in errors], [('update', 'sub_1')])
+
+
+if __name__ == '__main__':
+    unittest.main()
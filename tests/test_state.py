@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for diff-aware updates."""
+
+import unittest
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from python_baremetrics import BaremetricsClient
+
+from tests import TEST_TOKEN, response
+
+
+class TestStateTracking(unittest.TestCase):
+
+    def setUp(self):
+        self.transport = mock.Mock()
+        self.test_client = BaremetricsClient(
+            token=TEST_TOKEN, sandbox=True, track_state=True, transport=self.transport)
+
+    def tearDown(self):
+        del self.test_client
+
+    def sent(self):
+        return [c[1].get('data') for c in self.transport.request.call_args_list if c[0][0] == 'PUT']
+
+    def test_update_sends_only_changes(self):
+        self.transport.request.return_value = response(
+            {'customer': {'oid': 'cus_1', 'name': 'A', 'email': 'a@example.com'}})
+
+        self.test_client.show_customer('src', 'cus_1')
+        self.test_client.update_customer('src', 'cus_1', name='B', email='a@example.com')
+
+        self.assertEqual(self.sent(), [{'name': 'B'}])
+
+    def test_noop_update_is_skipped(self):
+        self.transport.request.return_value = response({'plan': {}})
+
+        self.test_client.update_plan('src', 'plan_1', 'Gold')
+        self.test_client.update_plan('src', 'plan_1', 'Gold')
+
+        self.assertEqual(len(self.sent()), 1)
+        self.assertEqual(self.test_client.state.round_trips_saved, 1)
+
+    def test_subscription_update_keeps_plan_oid(self):
+        self.transport.request.return_value = response({'subscription': {
+            'oid': 'sub_1', 'plan': {'oid': 'plan_1'}, 'quantity': 1}})
+
+        self.test_client.show_subscription('src', 'sub_1')
+        self.test_client.update_subscription('src', 'sub_1', 'plan_1', quantity=1)
+        self.assertEqual(self.sent(), [])
+
+        self.test_client.update_subscription('src', 'sub_1', 'plan_1', quantity=2)
+        self.assertEqual(self.sent(), [{'quantity': 2, 'plan_oid': 'plan_1'}])
+
+
+if __name__ == '__main__':
+    unittest.main()
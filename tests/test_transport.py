@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `python_baremetrics.transport` module."""
+
+import unittest
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from python_baremetrics import BaremetricsException, HTTP2Transport, RequestsTransport
+
+
+class TestRequestsTransport(unittest.TestCase):
+
+    def test_pool_size(self):
+        transport = RequestsTransport(pool_size=3)
+        adapter = transport.session.get_adapter('https://api.baremetrics.com')
+        self.assertEqual(adapter._pool_maxsize, 3)
+
+    def test_request(self):
+        transport = RequestsTransport(timeout=5)
+        transport.session = mock.Mock()
+
+        r = transport.request('POST', 'https://api.baremetrics.com/v1/src/plans',
+                              headers={'Accept': 'application/json'}, data={'name': 'Plan'})
+
+        self.assertIs(r, transport.session.request.return_value)
+        transport.session.request.assert_called_once_with(
+            'POST', 'https://api.baremetrics.com/v1/src/plans', headers={'Accept': 'application/json'},
+            params=None, data={'name': 'Plan'}, timeout=5)
+
+    def test_close(self):
+        transport = RequestsTransport()
+        transport.session = mock.Mock()
+        transport.close()
+        transport.session.close.assert_called_once_with()
+
+
+class TestHTTP2Transport(unittest.TestCase):
+
+    def setUp(self):
+        self.httpx = mock.Mock()
+        patcher = mock.patch.dict('sys.modules', {'httpx': self.httpx})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.transport = HTTP2Transport(max_connections=2, timeout=10)
+        self.client = self.httpx.Client.return_value
+
+    def test_client(self):
+        self.httpx.Limits.assert_called_once_with(max_connections=2)
+        self.httpx.Client.assert_called_once_with(http2=True, timeout=10, limits=self.httpx.Limits.return_value)
+
+    def test_form_data(self):
+        r = self.transport.request('PUT', 'https://api.baremetrics.com/v1/src/plans/p',
+                                   headers={}, params={}, data={'name': 'Plan'})
+
+        self.assertIs(r, self.client.request.return_value)
+        self.client.request.assert_called_once_with(
+            'PUT', 'https://api.baremetrics.com/v1/src/plans/p', headers={}, params=None, data={'name': 'Plan'})
+
+    def test_bytes_are_sent_as_content(self):
+        self.transport.request('POST', 'https://api.baremetrics.com/v1/src/plans',
+                               params={'page': 1}, data=b'\x1f\x8b')
+
+        self.client.request.assert_called_once_with(
+            'POST', 'https://api.baremetrics.com/v1/src/plans', headers=None, params={'page': 1}, content=b'\x1f\x8b')
+
+    def test_close(self):
+        self.transport.close()
+        self.client.close.assert_called_once_with()
+
+    def test_requires_httpx(self):
+        with mock.patch.dict('sys.modules', {'httpx': None}):
+            self.assertRaises(BaremetricsException, HTTP2Transport)
+
+
+if __name__ == '__main__':
+    unittest.main()